@@ -0,0 +1,258 @@
+"""Synthetic data generator and benchmarks for the valuation path.
+
+Generates realistic /outputfile inventory files and price lists at any
+size, then times the hot paths of main.py headlessly (parsing, price
+lookup with the dict and compact tables, aggregation, formatting,
+persistence and the Delete Items model) and writes the timings as JSON
+so runs can be compared across versions.
+
+    python benchmark.py generate --rows 100000 --prices 50000 --out bench_data
+    python benchmark.py run --sizes 100 10000 1000000 --output bench_results.json
+    python benchmark.py run --compare bench_results.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+import main
+
+# Words used to build item names that look like EverQuest loot
+NAME_PREFIXES = ["Spell:", "Tome of", "Rusty", "Tarnished", "Fine Steel", "Ancient", "Cracked", "Pristine",
+                 "Large", "Small", "Ruined", "Glowing", "Shadowed", "Ornate", "Bone"]
+NAME_NOUNS = ["Beetle Carapace", "Wolf Pelt", "Bear Skin", "Scimitar", "Dagger", "Broad Sword", "Gem",
+              "Jasper", "Silk Swatch", "Bone Chips", "Snake Scales", "Spider Legs", "Shard", "Ring",
+              "Cloak", "Pendril's Animation", "Fire Beetle Eye", "Chunk of Meat", "Rat Whiskers"]
+
+# Equipped slots in the order /outputfile inventory writes them
+EQUIPPED_SLOTS = ["Charm", "Ear", "Head", "Face", "Ear", "Neck", "Shoulders", "Arms", "Back", "Wrist",
+                  "Wrist", "Range", "Hands", "Primary", "Secondary", "Fingers", "Fingers", "Chest",
+                  "Legs", "Feet", "Waist", "Power Source", "Ammo"]
+
+# Default sizes for a benchmark run, in inventory rows / price list entries
+DEFAULT_SIZES = [100, 1000, 10000, 100000]
+
+# A benchmark slower than this factor of the baseline counts as a regression
+REGRESSION_THRESHOLD = 1.25
+
+# Baselines faster than this are timer noise and aren't compared
+MIN_COMPARE_SECONDS = 0.001
+
+def make_item_names(count, seed=0):
+    """Return count distinct, realistic item names"""
+    rng = random.Random(seed)
+    names = []
+    seen = set()
+    while len(names) < count:
+        name = f"{rng.choice(NAME_PREFIXES)} {rng.choice(NAME_NOUNS)}"
+        if name in seen:
+            name = f"{name} {len(names)}"
+        seen.add(name)
+        names.append(name)
+    return names
+
+def generate_price_list(path, entries, seed=0):
+    """Write a price list of `entries` items in the eq_calculator_items.json format"""
+    rng = random.Random(seed)
+    prices = {name: rng.randint(1, 50000) for name in make_item_names(entries, seed)}
+    with open(path, 'w') as f:
+        json.dump(prices, f, indent=4)
+    return prices
+
+def generate_inventory(path, rows, item_names, seed=0, priced_share=0.8):
+    """Write an /outputfile inventory file with about `rows` rows.
+
+    The file has the real tab-separated header, the equipped slots, then
+    bags in General slots, the bank and the shared bank, each bag followed
+    by its contents. Roughly priced_share of the items come from
+    item_names; the rest are names the price list won't know.
+    """
+    rng = random.Random(seed)
+
+    def pick_name():
+        if rng.random() < priced_share:
+            return rng.choice(item_names)
+        return f"Unknown Item {rng.randint(1, 1000000)}"
+
+    with open(path, 'w', newline='') as f:
+        f.write("Location\tName\tID\tCount\tSlots\n")
+        written = 0
+        for slot in EQUIPPED_SLOTS:
+            if written >= rows:
+                break
+            f.write(f"{slot}\t{pick_name()}\t{rng.randint(1000, 99999)}\t1\t0\n")
+            written += 1
+
+        # Fill bags until the row count is reached, spilling into bank and shared bank
+        bag = 0
+        while written < rows:
+            bag += 1
+            if bag <= 10:
+                location = f"General{bag}"
+            elif bag <= 34:
+                location = f"Bank{bag - 10}"
+            else:
+                location = f"SharedBank{bag - 34}"
+            f.write(f"{location}\tBackpack\t17005\t1\t10\n")
+            written += 1
+            for slot in range(1, 11):
+                if written >= rows:
+                    break
+                count = rng.choice([1, 1, 1, 5, 20, 100])
+                f.write(f"{location}-Slot{slot}\t{pick_name()}\t{rng.randint(1000, 99999)}\t{count}\t0\n")
+                written += 1
+
+def time_call(func, repeat):
+    """Run func repeat times and return (best, median) wall time in seconds"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings), statistics.median(timings)
+
+def run_size(size, folder, repeat):
+    """Time every benchmark for one inventory/price list size"""
+    item_names = make_item_names(size)
+    prices_file = os.path.join(folder, f"prices_{size}.json")
+    inventory_file = os.path.join(folder, f"Bench_vox-Inventory_{size}.txt")
+    item_prices = generate_price_list(prices_file, size)
+    generate_inventory(inventory_file, size, item_names)
+
+    price_index = main.build_price_index(item_prices)
+    engine = main.ValuationEngine(item_prices, price_index)
+    compact_engine = main.ValuationEngine(main.CompactPriceTable(item_prices))
+    inventory = main.read_inventory(inventory_file)
+    copper_values = [price * 7 for price in item_prices.values()]
+
+    def lookup():
+        for key, entry in inventory['items'].items():
+            engine.price_of(entry[0])
+
+    def compact_lookup():
+        for key, entry in inventory['items'].items():
+            compact_engine.price_of(entry[0])
+
+    def aggregate():
+        engine.value_inventory(inventory_file, main.LOCATION_CLASSES)
+
+    def format_column():
+        main.format_currency.cache_clear()
+        main.format_currency_column(copper_values)
+
+    def delete_dialog_model():
+        # What DeleteItemsDialog.populate_tree does, plus formatting the first page
+        rows = sorted(item_prices.items())
+        main.format_currency_column([price for _, price in rows[:15]])
+
+    price_file = main.PriceFile(os.path.join(folder, f"items_{size}.json"))
+    price_file.save(item_prices)
+    db_file = os.path.join(folder, f"items_{size}.db")
+    store = main.SQLitePriceStore(db_file)
+    store.replace_all(item_prices)
+    changed_name = next(iter(item_prices))
+
+    benchmarks = {
+        'parse': lambda: main.read_inventory(inventory_file),
+        'build_price_index': lambda: main.build_price_index(item_prices),
+        'lookup': lookup,
+        'compact_build': lambda: main.CompactPriceTable(item_prices),
+        'compact_lookup': compact_lookup,
+        'aggregate': aggregate,
+        'format': format_column,
+        'delete_dialog_model': delete_dialog_model,
+        'json_save': lambda: price_file.save(item_prices),
+        'json_load': price_file.load,
+        'sqlite_load': store.load,
+        'sqlite_single_edit': lambda: store.apply_changes(item_prices, [changed_name]),
+    }
+
+    results = {}
+    for name, func in benchmarks.items():
+        best, median = time_call(func, repeat)
+        results[name] = {'best': best, 'median': median}
+        print(f"{size:>9} {name:<22} best {best * 1000:10.2f} ms   median {median * 1000:10.2f} ms")
+
+    store.close()
+    return results
+
+def run_benchmarks(sizes, repeat):
+    """Run every benchmark at every size in a scratch folder"""
+    results = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S"),
+        'repeat': repeat,
+        'sizes': {}
+    }
+    with tempfile.TemporaryDirectory(prefix="eq_bench_") as folder:
+        for size in sizes:
+            results['sizes'][str(size)] = run_size(size, folder, repeat)
+    return results
+
+def compare_results(results, baseline):
+    """Print how each benchmark moved against a baseline run; return the regressions"""
+    regressions = []
+    for size, benchmarks in results['sizes'].items():
+        for name, timing in benchmarks.items():
+            previous = baseline.get('sizes', {}).get(size, {}).get(name)
+            if not previous or previous['best'] < MIN_COMPARE_SECONDS:
+                continue
+            ratio = timing['best'] / previous['best']
+            marker = "  REGRESSION" if ratio > REGRESSION_THRESHOLD else ""
+            print(f"{size:>9} {name:<22} {ratio:6.2f}x{marker}")
+            if marker:
+                regressions.append((size, name, ratio))
+    return regressions
+
+def main_cli(argv):
+    parser = argparse.ArgumentParser(description="Generate synthetic data and benchmark the valuation path.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    generate_parser = subparsers.add_parser('generate', help="write a synthetic inventory and price list")
+    generate_parser.add_argument('--rows', type=int, default=10000, help="inventory rows (default: 10000)")
+    generate_parser.add_argument('--prices', type=int, default=10000, help="price list entries (default: 10000)")
+    generate_parser.add_argument('--character', default="Bench", help="character name for the file name")
+    generate_parser.add_argument('--server', default="vox", help="short server name for the file name")
+    generate_parser.add_argument('--seed', type=int, default=0, help="random seed (default: 0)")
+    generate_parser.add_argument('--out', default=".", help="output folder (default: current folder)")
+
+    run_parser = subparsers.add_parser('run', help="time the hot paths at several sizes")
+    run_parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                            help=f"rows/entries per run (default: {' '.join(map(str, DEFAULT_SIZES))})")
+    run_parser.add_argument('--repeat', type=int, default=3, help="runs per benchmark (default: 3)")
+    run_parser.add_argument('--output', '-o', help="write results as JSON to this file")
+    run_parser.add_argument('--compare', metavar='BASELINE',
+                            help="compare with an earlier results file; exit 1 on regressions")
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'generate':
+        os.makedirs(args.out, exist_ok=True)
+        item_names = make_item_names(args.prices, args.seed)
+        prices_file = os.path.join(args.out, "eq_calculator_items.json")
+        inventory_file = os.path.join(args.out, f"{args.character}_{args.server}-Inventory.txt")
+        generate_price_list(prices_file, args.prices, args.seed)
+        generate_inventory(inventory_file, args.rows, item_names, args.seed)
+        print(f"Wrote {prices_file} and {inventory_file}")
+        return 0
+
+    results = run_benchmarks(args.sizes, args.repeat)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=4)
+
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            baseline = json.load(f)
+        if compare_results(results, baseline):
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main_cli(sys.argv[1:]))
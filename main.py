@@ -1,12 +1,2187 @@
-import tkinter as tk
-from tkinter import ttk, filedialog, messagebox
+try:
+    import tkinter as tk
+    from tkinter import ttk, filedialog, messagebox
+except ImportError:
+    # The engine and command line don't need Tk, e.g. on a server without python3-tk
+    tk = ttk = filedialog = messagebox = None
 import csv
 import re
 import json
+import sqlite3
+import hashlib
+import tempfile
+import time
+import io
 import os
+import sys
+import argparse
+import multiprocessing
+import threading
+import queue
+import urllib.request
+import urllib.error
+import urllib.parse
+import cProfile
+from contextlib import contextmanager
+from functools import lru_cache
+from collections import Counter
+from collections.abc import Mapping, MutableMapping, Sequence
+from array import array
+import bisect
+import heapq
+import itertools
+from operator import itemgetter
+from concurrent.futures import ProcessPoolExecutor
+
+# Server name mappings for file names
+SERVER_NAME_MAPPINGS = {
+    "Agnarr": "agnarr",
+    "Antonius Bayle - Kane Bayle": "antonius",
+    "Aradune": "aradune",
+    "Bertoxxulous - Sarym": "bertox",
+    "Bristlebane - The Tribunal": "bristle",
+    "Cazic-Thule - Fennin Ro": "cazic",
+    "Drinal - Maelin Starpyre": "drinal",
+    "Erollisi Marr - The Nameless": "erollisi",
+    "Firiona Vie": "firiona",
+    "Luclin - Stromm": "luclin",
+    "Mangler": "mangler",
+    "Mischief": "mischief",
+    "Oakwynd": "oakwynd",
+    "Povar - Quellious": "povar",
+    "Ragefire": "ragefire",
+    "Rizlona": "rizlona",
+    "Teek": "teek",
+    "The Rathe - Prexus": "rathe",
+    "Tormax": "tormax",
+    "Tunare - The Seventh Hammer": "tunare",
+    "Vaniki": "vaniki",
+    "Vox": "vox",
+    "Xegony - Druzzil Ro": "xegony",
+    "Yelinak": "yelinak",
+    "Zek": "zek"
+}
+
+# EverQuest servers list
+EQ_SERVERS = list(SERVER_NAME_MAPPINGS.keys())
+
+# Default item prices dictionary (all values converted to copper)
+DEFAULT_ITEM_PRICES = {
+    "Chunk of Meat": 13,  # 1s 3c
+    "Wolf Meat": 10,      # 1s
+    "Pristine Pyre Beetle Carapace": 95,  # 9s 5c
+    "Cracked Pyre Beetle Carapace": 24,   # 2s 4c
+    "Fire Beetle Eye": 27,               # 2s 7c
+    "Snake Scales": 10,                  # 1s
+    "Garter Snake Tongue": 6,             # 6c
+    "Ruined Wolf Pelt": 10,              # 1s
+    "Rusty Scimitar": 181,              # 1g 8s 1c
+    "Tiny Dagger": 10,                   # 1s
+    "Spell: Pendril's Animation": 19     # 1s 9c
+}
+
+# Default locations of the saved price list and config
+ITEMS_FILE = "eq_calculator_items.json"
+ITEMS_DB_FILE = "eq_calculator_items.db"
+CONFIG_FILE = "eq_calculator_config.json"
+CACHE_FILE = "eq_calculator_cache.db"
+HISTORY_FILE = "eq_calculator_history.db"
+SERVER_PRICES_FILE = "eq_calculator_server_prices.json"
+FEED_STATE_FILE = "eq_calculator_feed_state.json"
+
+# Sort keys for the result grid columns; rows start with (item name, quantity,
+# price, total) with prices in copper, so numeric columns sort as numbers
+RESULT_SORT_KEYS = {
+    'Item Name': lambda row: row[0].casefold(),
+    'Quantity': itemgetter(1),
+    'Price': itemgetter(2),
+    'Total': itemgetter(3)
+}
+
+# Slot classes in an /outputfile inventory; the calculator values General
+# (inventory and bag contents) unless all slots are asked for
+LOCATION_CLASSES = ('General', 'Bank', 'Shared Bank', 'Equipped')
+DEFAULT_LOCATIONS = ('General',)
+
+# Inventory files written by /outputfile inventory: CharacterName_server-Inventory.txt
+INVENTORY_FILE_PATTERN = re.compile(r"^(?P<character>[^_]+)_(?P<server>[^-]+)-Inventory\.txt$", re.IGNORECASE)
+
+class Profiler:
+    """Opt-in phase timings and counters for valuations and saves (EQ_CALC_PROFILE=1).
+    
+    While disabled every method returns straight away, so the calls can stay in the hot paths.
+    """
+    
+    def __init__(self, enabled=False, stats_file=None):
+        self.enabled = enabled
+        self.stats_file = stats_file
+        self.local = threading.local()
+        self.profile_lock = threading.Lock()
+        self.last_summary = ""
+    
+    @classmethod
+    def from_environment(cls):
+        enabled = os.environ.get('EQ_CALC_PROFILE', '') not in ('', '0')
+        return cls(enabled, os.environ.get('EQ_CALC_PROFILE_STATS') or None)
+    
+    @contextmanager
+    def operation(self, name):
+        """Record one operation; phases and counts inside it on this thread are attributed to it"""
+        if not self.enabled:
+            yield
+            return
+        
+        previous = getattr(self.local, 'record', None)
+        record = self.local.record = {'phases': {}, 'counts': Counter()}
+        
+        # Only one cProfile can run at a time, so a save overlapping a calculation isn't profiled
+        profile = None
+        if self.stats_file and self.profile_lock.acquire(blocking=False):
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError:
+                profile = None
+                self.profile_lock.release()
+        
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.local.record = previous
+            if profile is not None:
+                profile.disable()
+                try:
+                    profile.dump_stats(self.stats_file)
+                except OSError as e:
+                    print(f"Error writing profile to {self.stats_file}: {str(e)}", file=sys.stderr)
+                finally:
+                    self.profile_lock.release()
+            self.report(self.summarize(name, elapsed, record))
+    
+    def report(self, summary):
+        """Print a summary line and keep it for the status bar"""
+        self.last_summary = summary
+        print(summary, file=sys.stderr)
+    
+    @contextmanager
+    def phase(self, name):
+        """Time one phase of the current operation; repeated phases add up"""
+        record = getattr(self.local, 'record', None) if self.enabled else None
+        if record is None:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            phases = record['phases']
+            phases[name] = phases.get(name, 0.0) + time.perf_counter() - start
+    
+    def count(self, name, amount=1):
+        """Add to a counter of the current operation"""
+        if not self.enabled:
+            return
+        record = getattr(self.local, 'record', None)
+        if record is not None:
+            record['counts'][name] += amount
+    
+    @staticmethod
+    def summarize(name, elapsed, record):
+        parts = [f"{name} {elapsed * 1000:.1f} ms"]
+        parts.extend(f"{phase} {seconds * 1000:.1f} ms" for phase, seconds in record['phases'].items())
+        counts = record['counts']
+        parts.extend(f"{counter} {value}" for counter, value in counts.items())
+        lookups = counts['cache hits'] + counts['cache misses']
+        if lookups:
+            parts.append(f"cache hit rate {100 * counts['cache hits'] // lookups}%")
+        return ", ".join(parts)
+
+# Instrumentation shared by the GUI and the command line, off unless EQ_CALC_PROFILE is set
+PROFILER = Profiler.from_environment()
+
+@lru_cache(maxsize=8192)
+def format_currency(copper):
+    """Convert copper to platinum/gold/silver/copper format.
+    
+    Results are cached since the same prices and totals come up over and
+    over in a valuation.
+    """
+    platinum = copper // 1000
+    gold = (copper % 1000) // 100
+    silver = (copper % 100) // 10
+    copper = copper % 10
+    
+    result = []
+    if platinum > 0:
+        result.append(f"{platinum}p")
+    if gold > 0:
+        result.append(f"{gold}g")
+    if silver > 0:
+        result.append(f"{silver}s")
+    if copper > 0 or not result:  # Show copper if it's the only value
+        result.append(f"{copper}c")
+    
+    return " ".join(result)
+
+def format_currency_column(values):
+    """Format a whole column of copper values in one call"""
+    return list(map(format_currency, values))
+
+def build_price_index(item_prices):
+    """Build the case-insensitive name lookup for a price table.
+
+    Maps each casefolded item name to the name stored in the table so
+    lookups and duplicate checks are O(1). The first spelling wins if the
+    table contains several names that only differ by case.
+    """
+    if isinstance(item_prices, CompactPriceTable):
+        return item_prices.index
+    price_index = {}
+    for item_name in item_prices:
+        price_index.setdefault(item_name.casefold(), item_name)
+    return price_index
+
+def drop_case_duplicates(item_prices, price_index):
+    """Delete names that only differ by case from the spelling price_index keeps; returns them.
+    
+    Old price lists can hold such names. They can't be looked up, and deleting the indexed
+    spelling would leave them behind without an index entry.
+    """
+    dropped = [item_name for item_name in item_prices if price_index[item_name.casefold()] != item_name]
+    for item_name in dropped:
+        del item_prices[item_name]
+    return dropped
+
+def plain_prices(item_prices):
+    """Return a price table as a plain dict, e.g. for json.dumps; dicts are returned as is.
+    
+    Compact tables are in hash order, which changes between runs, so they come out sorted by name.
+    """
+    if isinstance(item_prices, dict):
+        return item_prices
+    return dict(sorted(item_prices.items(), key=lambda item: item[0].casefold()))
+
+def merge_off_thread(item_prices, changes):
+    """Apply changes to a compact table copy on a worker thread and return it, else None.
+    
+    The Tk thread then swaps the merged arrays in with apply_price_changes
+    instead of rebuilding a large table itself.
+    """
+    if not isinstance(item_prices, CompactPriceTable) or not changes:
+        return None
+    item_prices.merge(changes)
+    return item_prices
+
+def apply_price_changes(item_prices, changes, merged=None, version=None):
+    """Apply {name: price} changes on the Tk thread, using a table from merge_off_thread if still current"""
+    if merged is not None and item_prices.version == version:
+        item_prices.install(merged)
+    else:
+        item_prices.update(changes)
+
+class CompactPriceTable(MutableMapping):
+    """A price table kept in flat arrays sorted by name hash instead of a dict of str and int objects.
+    
+    Lookups are case-insensitive bisects. The arrays are replaced, never
+    resized in place, so a worker thread can read them while the Tk thread edits.
+    """
+    
+    DELETED = -1
+    
+    def __init__(self, items=()):
+        # (hashes, offsets, names blob, prices); offsets has one extra entry for the end
+        self.base = (array('q'), array('q', [0]), b'', array('q'))
+        self.live = 0
+        self.deleted = 0
+        self.added = {}  # casefolded name -> [name, price] not yet merged into the arrays
+        self.version = 0  # bumped on every edit, so a merge built from a copy can tell it is stale
+        self.index = CompactPriceIndex(self)
+        self.rebuild(items.items() if isinstance(items, Mapping) else items)
+    
+    def rebuild(self, items=()):
+        """Merge the pending additions and items into new arrays and drop deleted slots.
+        
+        Items whose name is already in the table are ignored.
+        """
+        entries = []
+        position = 0
+        for name, price in itertools.chain(self.base_items(),
+                                           list(self.added.values()), items):
+            entries.append((hash(name.casefold()), position, name, price))
+            position += 1
+        entries.sort(key=itemgetter(0, 1))
+        
+        hashes, offsets, prices = array('q'), array('q', [0]), array('q')
+        blob = bytearray()
+        group_hash, group_keys = None, set()
+        for name_hash, _, name, price in entries:
+            key = name.casefold()
+            if name_hash != group_hash:
+                group_hash, group_keys = name_hash, set()
+            elif key in group_keys:
+                continue
+            group_keys.add(key)
+            if price < 0:
+                raise ValueError(f"Negative price for {name}: {price}")
+            hashes.append(name_hash)
+            blob += name.encode('utf-8')
+            offsets.append(len(blob))
+            prices.append(price)
+        
+        self.base = (hashes, offsets, bytes(blob), prices)
+        self.live = len(hashes)
+        self.deleted = 0
+        self.added = {}
+    
+    def base_items(self):
+        """Yield (name, price) for the live slots of the arrays, in hash order"""
+        _, offsets, blob, prices = self.base
+        for slot, price in enumerate(prices):
+            if price != self.DELETED:
+                yield blob[offsets[slot]:offsets[slot + 1]].decode('utf-8'), price
+    
+    def find(self, key, base=None):
+        """Return the array slot holding the casefolded name key, or -1"""
+        hashes, offsets, blob, prices = base or self.base
+        key_hash = hash(key)
+        slot = bisect.bisect_left(hashes, key_hash)
+        while slot < len(hashes) and hashes[slot] == key_hash:
+            if (prices[slot] != self.DELETED
+                    and blob[offsets[slot]:offsets[slot + 1]].decode('utf-8').casefold() == key):
+                return slot
+            slot += 1
+        return -1
+    
+    def lookup(self, key):
+        """Return (stored name, price) for a casefolded name, or None"""
+        entry = self.added.get(key)
+        if entry is not None:
+            return entry[0], entry[1]
+        base = self.base
+        slot = self.find(key, base)
+        if slot < 0:
+            return None
+        _, offsets, blob, prices = base
+        return blob[offsets[slot]:offsets[slot + 1]].decode('utf-8'), prices[slot]
+    
+    def __getitem__(self, name):
+        found = self.lookup(name.casefold())
+        if found is None:
+            raise KeyError(name)
+        return found[1]
+    
+    def get(self, name, default=None):
+        found = self.lookup(name.casefold())
+        return default if found is None else found[1]
+    
+    def __contains__(self, name):
+        return isinstance(name, str) and self.lookup(name.casefold()) is not None
+    
+    def __setitem__(self, name, price):
+        if price < 0:
+            raise ValueError(f"Negative price for {name}: {price}")
+        self.version += 1
+        key = name.casefold()
+        entry = self.added.get(key)
+        if entry is not None:
+            entry[1] = price
+            return
+        slot = self.find(key)
+        if slot >= 0:
+            self.base[3][slot] = price
+            return
+        self.added[key] = [name, price]
+        if len(self.added) > max(1024, self.live // 8):
+            self.rebuild()
+    
+    def __delitem__(self, name):
+        self.version += 1
+        key = name.casefold()
+        if self.added.pop(key, None) is not None:
+            return
+        slot = self.find(key)
+        if slot < 0:
+            raise KeyError(name)
+        self.base[3][slot] = self.DELETED
+        self.live -= 1
+        self.deleted += 1
+        if self.deleted > max(1024, self.live // 4):
+            self.rebuild()
+    
+    def merge(self, changes):
+        """Apply {name: price}, with at most one rebuild for all the new names"""
+        new_items = {}  # casefolded name -> [name, price], so a repeated name updates the price like update() does
+        for name, price in changes.items():
+            if price < 0:
+                raise ValueError(f"Negative price for {name}: {price}")
+            key = name.casefold()
+            entry = self.added.get(key) or new_items.get(key)
+            slot = -1 if entry is not None else self.find(key)
+            if entry is not None:
+                entry[1] = price
+            elif slot >= 0:
+                self.base[3][slot] = price
+            else:
+                new_items[key] = [name, price]
+        if new_items:
+            self.rebuild(new_items.values())
+        self.version += 1
+    
+    def install(self, merged):
+        """Take over the arrays of a merged copy of this table"""
+        self.base, self.added = merged.base, merged.added
+        self.live, self.deleted = merged.live, merged.deleted
+        self.version += 1
+    
+    def __iter__(self):
+        for name, _ in self.items():
+            yield name
+    
+    def __len__(self):
+        return self.live + len(self.added)
+    
+    def items(self):
+        """Yield (name, price) pairs; unlike dict.items() this is a one-shot iterator"""
+        yield from self.base_items()
+        for name, price in list(self.added.values()):
+            yield name, price
+    
+    def values(self):
+        for _, price in self.items():
+            yield price
+    
+    def copy(self):
+        """Return an independent copy; only the prices array and pending additions are copied"""
+        table = CompactPriceTable.__new__(CompactPriceTable)
+        hashes, offsets, blob, prices = self.base
+        table.base = (hashes, offsets, blob, array('q', prices))
+        table.live = self.live
+        table.deleted = self.deleted
+        table.added = {key: list(entry) for key, entry in self.added.items()}
+        table.version = self.version
+        table.index = CompactPriceIndex(table)
+        return table
+    
+    def __reduce__(self):
+        # String hashes differ between processes, so rebuild from the items when unpickled
+        return CompactPriceTable, (list(self.items()),)
+    
+    def nbytes(self):
+        """Approximate memory held by the arrays, not counting pending additions"""
+        hashes, offsets, blob, prices = self.base
+        return sum(a.itemsize * len(a) for a in (hashes, offsets, prices)) + len(blob)
+
+class CompactPriceIndex(Mapping):
+    """The price index (casefolded name -> stored name) of a CompactPriceTable.
+    
+    The table indexes itself, so the writes callers make to keep a dict
+    index in sync are accepted and ignored.
+    """
+    
+    def __init__(self, table):
+        self.table = table
+    
+    def __getitem__(self, key):
+        found = self.table.lookup(key)
+        if found is None:
+            raise KeyError(key)
+        return found[0]
+    
+    def get(self, key, default=None):
+        found = self.table.lookup(key)
+        return default if found is None else found[0]
+    
+    def __contains__(self, key):
+        return isinstance(key, str) and self.table.lookup(key) is not None
+    
+    def __setitem__(self, key, name):
+        pass
+    
+    def __delitem__(self, key):
+        pass
+    
+    def __iter__(self):
+        for name in self.table:
+            yield name.casefold()
+    
+    def __len__(self):
+        return len(self.table)
+
+def parse_inventory_filename(path):
+    """Return (character, server) for an inventory file path, or None"""
+    match = INVENTORY_FILE_PATTERN.match(os.path.basename(path))
+    if not match:
+        return None
+    return match.group('character'), match.group('server')
+
+def location_class(location):
+    """Map an outputfile location such as "Bank3-Slot2" to its slot class"""
+    if location.startswith("General"):
+        return 'General'
+    if location.startswith("SharedBank"):
+        return 'Shared Bank'
+    if location.startswith("Bank"):
+        return 'Bank'
+    return 'Equipped'
+
+def iter_inventory_rows(file, bad_rows=None):
+    """Stream (location, name, id, count, slots) rows from an /outputfile inventory file.
+    
+    Reads one line at a time so memory stays flat however large the file is.
+    Every slot is returned; the header line and blank lines are dropped.
+    The delimiter (tab in real outputfiles, comma in hand-made ones) is
+    detected from the first row. Malformed rows are appended to `bad_rows`
+    as (line number, text, reason) instead of aborting the parse.
+    """
+    delimiter = None
+    for line_number, line in enumerate(file, 1):
+        if line.startswith("Location") or not line.strip():
+            continue
+        
+        line = line.rstrip("\r\n")
+        if delimiter is None:
+            delimiter = '\t' if '\t' in line else ','
+        
+        # Only quoted fields need the csv module
+        if '"' in line:
+            fields = next(csv.reader([line], delimiter=delimiter))
+        else:
+            fields = line.split(delimiter)
+        
+        if len(fields) < 5:
+            if bad_rows is not None:
+                bad_rows.append((line_number, line, f"expected 5 columns, found {len(fields)}"))
+            continue
+        
+        try:
+            count = int(fields[3])
+        except ValueError:
+            if bad_rows is not None:
+                bad_rows.append((line_number, line, f"invalid count: {fields[3]!r}"))
+            continue
+        
+        yield fields[0], fields[1], fields[2], count, fields[4]
+
+class HashingReader(io.RawIOBase):
+    """Binary file wrapper that feeds every byte read through it to a hashlib object"""
+    
+    def __init__(self, file, sha256):
+        self.file = file
+        self.sha256 = sha256
+    
+    def readable(self):
+        return True
+    
+    def readinto(self, buffer):
+        count = self.file.readinto(buffer)
+        if count:
+            self.sha256.update(memoryview(buffer)[:count])
+        return count
+    
+    def close(self):
+        self.file.close()
+        super().close()
+
+def file_sha256(path):
+    """Return the SHA-256 of a file, read in chunks"""
+    sha256 = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 16), b''):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+def read_inventory(inventory_file, sha256=None):
+    """Parse every slot of an inventory file, aggregated by item name.
+    
+    One pass over the file builds a dict keyed by casefolded item name,
+    mapping to [name as first seen, {slot class: count}], so an item
+    spread over bags, bank and shared bank becomes one entry. Returns a
+    dict with the file, character and server (when the name follows the
+    inventory file convention), those items and any rows that couldn't be
+    parsed. If sha256 (a hashlib object) is given it is fed the file's
+    bytes as they are read, so the file can be hashed in the same pass.
+    """
+    items = {}
+    bad_rows = []
+    if sha256 is not None:
+        file = io.TextIOWrapper(io.BufferedReader(HashingReader(open(inventory_file, 'rb'), sha256)), newline='')
+    else:
+        file = open(inventory_file, 'r', newline='')
+    rows = 0
+    with file:
+        for location, item_name, _, count, _ in iter_inventory_rows(file, bad_rows):
+            rows += 1
+            if count <= 0 or item_name == "Empty":
+                continue
+            key = item_name.casefold()
+            entry = items.get(key)
+            if entry is None:
+                items[key] = entry = [item_name, {}]
+            slot_class = location_class(location)
+            entry[1][slot_class] = entry[1].get(slot_class, 0) + count
+    PROFILER.count('rows', rows)
+    PROFILER.count('items', len(items))
+    PROFILER.count('bad rows', len(bad_rows))
+    
+    character, server = parse_inventory_filename(inventory_file) or (None, None)
+    return {
+        'file': inventory_file,
+        'character': character,
+        'server': server,
+        'items': items,
+        'bad_rows': bad_rows
+    }
+
+class DiskInventoryCache:
+    """Parsed inventories kept in SQLite between sessions, keyed by path, stat and SHA-256.
+    
+    A file rewritten with the same contents is only hashed, not parsed again.
+    """
+    
+    def __init__(self, path, max_entries=500, max_bytes=20 * 1024 * 1024):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, timeout=10, check_same_thread=False)
+        with self.connection:
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS inventories ("
+                "path TEXT NOT NULL PRIMARY KEY, "
+                "mtime_ns INTEGER NOT NULL, "
+                "size INTEGER NOT NULL, "
+                "sha256 TEXT, "
+                "last_used REAL NOT NULL, "
+                "data TEXT NOT NULL)"
+            )
+            self.connection.execute(
+                "CREATE INDEX IF NOT EXISTS inventories_last_used ON inventories (last_used)"
+            )
+    
+    def decode(self, inventory_file, data):
+        cached = json.loads(data)
+        character, server = parse_inventory_filename(inventory_file) or (None, None)
+        return {
+            'file': inventory_file,
+            'character': character,
+            'server': server,
+            'items': cached['items'],
+            'bad_rows': cached['bad_rows']
+        }
+    
+    def load(self, inventory_file, key):
+        """Return the parse of inventory_file, whose (mtime, size) is key, from the cache if possible.
+        
+        If the cache database can't be used (e.g. locked by other sweep
+        workers for too long) the file is simply parsed.
+        """
+        path = os.path.abspath(inventory_file)
+        try:
+            with PROFILER.phase('disk cache'), self.lock:
+                row = self.connection.execute(
+                    "SELECT mtime_ns, size, sha256, data FROM inventories WHERE path = ?", (path,)
+                ).fetchone()
+                if row is not None and (row[0], row[1]) == key:
+                    with self.connection:
+                        self.connection.execute("UPDATE inventories SET last_used = ? WHERE path = ?",
+                                                (time.time(), path))
+                    PROFILER.count('cache hits')
+                    return self.decode(inventory_file, row[3])
+        except sqlite3.Error as e:
+            print(f"Inventory cache {self.path} unavailable: {e}", file=sys.stderr)
+            row = None
+        
+        if row is not None and row[2] is not None and row[1] == key[1]:
+            # Maybe the same contents under a new timestamp; hashing is far cheaper than parsing
+            with PROFILER.phase('read'):
+                same_contents = file_sha256(inventory_file) == row[2]
+            if same_contents:
+                try:
+                    with self.lock, self.connection:
+                        self.connection.execute(
+                            "UPDATE inventories SET mtime_ns = ?, size = ?, last_used = ? WHERE path = ?",
+                            (key[0], key[1], time.time(), path)
+                        )
+                except sqlite3.Error as e:
+                    print(f"Inventory cache {self.path} unavailable: {e}", file=sys.stderr)
+                PROFILER.count('cache hits')
+                return self.decode(inventory_file, row[3])
+        
+        # Hash while parsing so the stored hash matches exactly what was parsed
+        PROFILER.count('cache misses')
+        sha256 = hashlib.sha256()
+        with PROFILER.phase('parse'):
+            inventory = read_inventory(inventory_file, sha256)
+        with PROFILER.phase('disk cache store'):
+            self.store(inventory_file, key, inventory, sha256.hexdigest())
+        return inventory
+    
+    def store(self, inventory_file, key, inventory, sha256=None):
+        """Save a parse and evict the least recently used entries if over the caps.
+        
+        The cache is only an optimization, so a database error skips the store.
+        """
+        data = json.dumps({'items': inventory['items'], 'bad_rows': inventory['bad_rows']},
+                          separators=(',', ':'))
+        try:
+            self.write(inventory_file, key, data, sha256)
+        except sqlite3.Error as e:
+            print(f"Inventory cache {self.path} unavailable, not storing {inventory_file}: {e}", file=sys.stderr)
+    
+    def write(self, inventory_file, key, data, sha256):
+        with self.lock, self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO inventories (path, mtime_ns, size, sha256, last_used, data) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (os.path.abspath(inventory_file), key[0], key[1], sha256, time.time(), data)
+            )
+            entries, total_bytes = self.connection.execute(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(data)), 0) FROM inventories"
+            ).fetchone()
+            while entries > 1 and (entries > self.max_entries or total_bytes > self.max_bytes):
+                oldest_path, oldest_bytes = self.connection.execute(
+                    "SELECT path, LENGTH(data) FROM inventories ORDER BY last_used LIMIT 1"
+                ).fetchone()
+                self.connection.execute("DELETE FROM inventories WHERE path = ?", (oldest_path,))
+                entries -= 1
+                total_bytes -= oldest_bytes
+
+class InventoryCache:
+    """Keeps parsed inventories in memory, keyed by path.
+    
+    An entry is reused for as long as the file's mtime and size are
+    unchanged, so revaluing an untouched file never re-reads it. With a
+    DiskInventoryCache behind it, parses also survive between sessions.
+    """
+    
+    def __init__(self, disk_cache=None):
+        self.entries = {}
+        self.disk_cache = disk_cache
+    
+    def file_key(self, inventory_file):
+        stat = os.stat(inventory_file)
+        return stat.st_mtime_ns, stat.st_size
+    
+    def is_current(self, inventory_file):
+        """Return True if the cached parse of inventory_file is still up to date"""
+        entry = self.entries.get(inventory_file)
+        if entry is None:
+            return False
+        try:
+            return entry[0] == self.file_key(inventory_file)
+        except OSError:
+            return False
+    
+    def cached_key(self, inventory_file):
+        """Return the (mtime, size) the cached parse was made from, or None"""
+        entry = self.entries.get(inventory_file)
+        return entry[0] if entry is not None else None
+    
+    def store(self, inventory_file, key, inventory):
+        """Record a parse made elsewhere (e.g. by a watcher thread) so it isn't read again"""
+        self.entries[inventory_file] = (key, inventory)
+        if self.disk_cache is not None:
+            self.disk_cache.store(inventory_file, key, inventory)
+    
+    def load(self, inventory_file):
+        """Return the parsed inventory, re-reading the file only if its stat changed"""
+        # Stat before reading so a write during the parse is caught next time
+        key = self.file_key(inventory_file)
+        entry = self.entries.get(inventory_file)
+        if entry is not None and entry[0] == key:
+            PROFILER.count('cache hits')
+            return entry[1]
+        
+        if self.disk_cache is not None:
+            inventory = self.disk_cache.load(inventory_file, key)
+        else:
+            PROFILER.count('cache misses')
+            with PROFILER.phase('parse'):
+                inventory = read_inventory(inventory_file)
+        self.entries[inventory_file] = (key, inventory)
+        return inventory
+
+class InventoryWatcher:
+    """Watches one inventory file on a worker thread and parses it when it changes.
+    
+    The file is polled with os.stat, which is cheap enough to run every
+    second. A change is only parsed once the stat has stayed the same for
+    one interval, so a file that EQ is still writing isn't read half-done
+    and then read again. Parsed inventories are put on `results` as
+    (path, key, inventory) for the UI thread to pick up.
+    """
+    
+    def __init__(self, inventory_file, known_key=None, interval=1.0):
+        self.inventory_file = inventory_file
+        self.interval = interval
+        self.results = queue.Queue()
+        self.parsed_key = known_key
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self.run, name="InventoryWatcher", daemon=True)
+    
+    def start(self):
+        self.thread.start()
+    
+    def stop(self):
+        self.stop_event.set()
+    
+    def run(self):
+        last_key = None
+        while not self.stop_event.wait(self.interval):
+            try:
+                stat = os.stat(self.inventory_file)
+            except OSError:
+                last_key = None
+                continue
+            
+            key = (stat.st_mtime_ns, stat.st_size)
+            if key != self.parsed_key and key == last_key:
+                try:
+                    inventory = read_inventory(self.inventory_file)
+                except (OSError, ValueError, csv.Error):
+                    continue
+                self.parsed_key = key
+                self.results.put((self.inventory_file, key, inventory))
+            last_key = key
+
+class NameSearchIndex:
+    """Prefix and trigram index over item names.
+    
+    Casefolded names are kept sorted for prefix search with bisect, and
+    every name's trigrams map to the ids of the names containing them.
+    Substring queries intersect the postings of the query's trigrams,
+    and similar() ranks names by shared trigrams to find near matches for
+    misspelled items. Names can be added and removed in place.
+    
+    Postings are array('i') rather than sets so the index stays small for
+    very large price lists. Ids only grow, so appending keeps every
+    posting sorted; a removed name is left as None in `names` and skipped.
+    """
+    
+    def __init__(self, names=()):
+        self.names = []
+        self.gram_counts = array('H')
+        self.grams = {}
+        for name in names:
+            self.add_grams(name)
+        
+        # sorted_keys and sorted_ids are parallel: the casefolded names in order and their ids
+        order = sorted(range(len(self.names)), key=lambda name_id: self.names[name_id].casefold())
+        self.sorted_keys = [self.names[name_id].casefold() for name_id in order]
+        self.sorted_ids = array('i', order)
+        del order
+        
+        # The sort is stable, so of two equal keys the later one has the later id
+        for position in range(len(self.sorted_keys) - 1, 0, -1):
+            if self.sorted_keys[position] == self.sorted_keys[position - 1]:
+                self.names[self.sorted_ids[position]] = None
+                del self.sorted_keys[position]
+                del self.sorted_ids[position]
+    
+    @staticmethod
+    def trigrams(key):
+        """Trigrams of a casefolded name, padded so word starts and ends count"""
+        padded = f"  {key} "
+        return {padded[i:i + 3] for i in range(len(padded) - 2)}
+    
+    def add_grams(self, name):
+        """Give name the next id and add it to its trigrams' postings"""
+        name_id = len(self.names)
+        grams = self.trigrams(name.casefold())
+        self.names.append(name)
+        self.gram_counts.append(min(len(grams), 0xFFFF))
+        for gram in grams:
+            posting = self.grams.get(gram)
+            if posting is None:
+                self.grams[gram] = posting = array('i')
+            posting.append(name_id)
+        return name_id
+    
+    def find(self, key):
+        """Return the position of a casefolded name in sorted_keys, or -1"""
+        position = bisect.bisect_left(self.sorted_keys, key)
+        if position < len(self.sorted_keys) and self.sorted_keys[position] == key:
+            return position
+        return -1
+    
+    def add(self, name):
+        key = name.casefold()
+        if self.find(key) >= 0:
+            return
+        name_id = self.add_grams(name)
+        position = bisect.bisect_left(self.sorted_keys, key)
+        self.sorted_keys.insert(position, key)
+        self.sorted_ids.insert(position, name_id)
+    
+    def remove(self, name):
+        position = self.find(name.casefold())
+        if position < 0:
+            return
+        self.names[self.sorted_ids[position]] = None
+        del self.sorted_keys[position]
+        del self.sorted_ids[position]
+    
+    @staticmethod
+    def in_posting(posting, name_id):
+        position = bisect.bisect_left(posting, name_id)
+        return position < len(posting) and posting[position] == name_id
+    
+    def prefix_range(self, query):
+        """Return the (start, end) positions in sorted_keys of names starting with query"""
+        query = query.casefold()
+        start = bisect.bisect_left(self.sorted_keys, query)
+        return start, bisect.bisect_left(self.sorted_keys, query + "\U0010ffff", start)
+    
+    def prefix(self, query, limit=None):
+        """Names starting with query (case-insensitive), in sorted order"""
+        start, end = self.prefix_range(query)
+        if limit is not None:
+            end = min(end, start + limit)
+        return [self.names[self.sorted_ids[position]] for position in range(start, end)]
+    
+    def contains(self, query):
+        """Names containing query anywhere (case-insensitive), unordered"""
+        return [self.names[name_id] for name_id in self.contains_ids(query)]
+    
+    def contains_sorted_ids(self, query):
+        """Ids of the names containing query, in name order"""
+        name_ids = self.contains_ids(query)
+        if len(name_ids) * 8 > len(self.sorted_ids):
+            # Cheaper to walk the sorted order once than to sort many matches
+            wanted = set(name_ids)
+            return [name_id for name_id in self.sorted_ids if name_id in wanted]
+        return sorted(name_ids, key=lambda name_id: self.names[name_id].casefold())
+    
+    def contains_ids(self, query):
+        """Ids of the names containing query anywhere (case-insensitive), unordered"""
+        query = query.casefold()
+        if len(query) < 3:
+            return [self.sorted_ids[position] for position, key in enumerate(self.sorted_keys) if query in key]
+        
+        # Start from the rarest trigram and check the candidates against the other postings
+        postings = sorted((self.grams.get(query[i:i + 3], array('i')) for i in range(len(query) - 2)), key=len)
+        candidates = [name_id for name_id in postings[0] if self.names[name_id] is not None]
+        for posting in postings[1:]:
+            if len(candidates) * 16 < len(posting):
+                candidates = [name_id for name_id in candidates if self.in_posting(posting, name_id)]
+            else:
+                wanted = set(candidates)
+                candidates = [name_id for name_id in posting if name_id in wanted]
+        if len(query) == 3 and query.strip() == query:
+            # Every name with this trigram contains the query
+            return candidates
+        return [name_id for name_id in candidates if query in self.names[name_id].casefold()]
+    
+    def similar(self, name, limit=3, cutoff=0.5):
+        """Up to `limit` names that share most of their trigrams with name, best first"""
+        query_grams = self.trigrams(name.casefold())
+        shared = Counter()
+        for gram in query_grams:
+            posting = self.grams.get(gram)
+            if posting:
+                shared.update(posting)
+        
+        scored = []
+        for name_id, count in shared.items():
+            candidate = self.names[name_id]
+            if candidate is None:
+                continue
+            score = count / (len(query_grams) + self.gram_counts[name_id] - count)
+            if score >= cutoff:
+                scored.append((score, candidate))
+        return [candidate for _, candidate in heapq.nlargest(limit, scored)]
+
+class PriceListRows(Sequence):
+    """(name, price) rows for name ids of a NameSearchIndex, by default the whole list in name order.
+    
+    Rows are only built when read, so a grid over it costs the same at any size.
+    """
+    
+    def __init__(self, search_index, item_prices, name_ids=None):
+        self.search_index = search_index
+        self.item_prices = item_prices
+        self.name_ids = name_ids
+    
+    def ids(self):
+        return self.search_index.sorted_ids if self.name_ids is None else self.name_ids
+    
+    def __len__(self):
+        return len(self.ids())
+    
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return [self.row(i) for i in range(*position.indices(len(self)))]
+        return self.row(position)
+    
+    def row(self, position):
+        item_name = self.search_index.names[self.ids()[position]]
+        return item_name, self.item_prices.get(item_name)
+
+class ServerPriceLayers:
+    """Sparse per-server price overrides on top of the shared price list.
+    
+    Each server (by its short name, as in inventory file names) has a
+    layer holding only the items whose price differs there, keyed by
+    casefolded name and mapping to (name, copper). Resolving a price for
+    a server is one lookup in its layer, then the shared price index, so
+    setting or clearing an override only touches that entry, edits to
+    the shared list need no rebuild at all, and 25 servers never hold 25
+    copies of a large price list.
+    """
+    
+    def __init__(self, overrides=None):
+        self.layers = {}
+        for server, prices in (overrides or {}).items():
+            for item_name, price in prices.items():
+                self.set_price(server, item_name, price)
+    
+    @staticmethod
+    def server_key(server):
+        """Short, casefolded name of a server given its full or short name"""
+        return SERVER_NAME_MAPPINGS.get(server, server).casefold()
+    
+    def layer(self, server):
+        """Return the {casefolded name: (name, copper)} overrides of a short server name, or None"""
+        return self.layers.get(server.casefold()) if server else None
+    
+    def get(self, server, item_name):
+        """Return the override (name, copper) of an item on a server, or None"""
+        layer = self.layers.get(self.server_key(server))
+        return layer.get(item_name.casefold()) if layer else None
+    
+    def set_price(self, server, item_name, price):
+        layer = self.layers.setdefault(self.server_key(server), {})
+        key = item_name.casefold()
+        # Keep the stored spelling
+        existing = layer.get(key)
+        layer[key] = (existing[0] if existing else item_name, price)
+    
+    def clear_price(self, server, item_name):
+        """Drop an override so the item uses the shared price again; returns True if there was one"""
+        server = self.server_key(server)
+        layer = self.layers.get(server)
+        if not layer or layer.pop(item_name.casefold(), None) is None:
+            return False
+        if not layer:
+            del self.layers[server]
+        return True
+    
+    def prices(self, server):
+        """Return a server's overrides as {name: copper}"""
+        layer = self.layers.get(self.server_key(server), {})
+        return {item_name: price for item_name, price in layer.values()}
+    
+    def to_dict(self):
+        """All overrides as {server: {name: copper}}, the format they are saved in"""
+        return {server: {item_name: price for item_name, price in layer.values()}
+                for server, layer in sorted(self.layers.items())}
+
+class ValuationEngine:
+    """Values inventory files against a price table without any UI.
+
+    The engine holds references to the price table and its index, so edits
+    made to them in place are picked up by the next valuation. When given an
+    InventoryCache, unchanged files are not parsed again. With
+    ServerPriceLayers, an inventory is valued with its server's overrides
+    on top of the shared prices.
+    """
+    
+    def __init__(self, item_prices, price_index=None, inventory_cache=None, server_prices=None):
+        self.item_prices = item_prices
+        self.price_index = price_index if price_index is not None else build_price_index(item_prices)
+        self.inventory_cache = inventory_cache
+        self.server_prices = server_prices
+    
+    def price_of(self, item_name, server=None):
+        """Return the price in copper of an item (case-insensitive) on a server, or None if unpriced"""
+        key = item_name.casefold()
+        if server is not None and self.server_prices is not None and self.server_prices.layers:
+            layer = self.server_prices.layer(server)
+            if layer:
+                override = layer.get(key)
+                if override is not None:
+                    return override[1]
+        if isinstance(self.item_prices, CompactPriceTable):
+            # One search finds both the name and the price
+            found = self.item_prices.lookup(key)
+            return None if found is None else found[1]
+        stored_item = self.price_index.get(key)
+        if stored_item is None:
+            return None
+        return self.item_prices[stored_item]
+    
+    def load_inventory(self, inventory_file):
+        """Parse an inventory file, through the cache if there is one"""
+        if self.inventory_cache is not None:
+            return self.inventory_cache.load(inventory_file)
+        return read_inventory(inventory_file)
+    
+    def near_matches(self, inventory, search_index, limit=3):
+        """Suggest price list names for unpriced items, e.g. slight spelling variants.
+        
+        Returns a list of (inventory name, [similar price list names]) for
+        each distinct unpriced item that has at least one suggestion.
+        """
+        report = []
+        for key, (item_name, _) in inventory['items'].items():
+            if self.price_of(item_name, inventory['server']) is not None:
+                continue
+            matches = search_index.similar(item_name, limit)
+            if matches:
+                report.append((item_name, matches))
+        return report
+    
+    def snapshot_items(self, inventory):
+        """Return {key: (name, quantity in all slots, unit price or None)} for a history snapshot"""
+        server = inventory['server']
+        return {key: (item_name, sum(location_counts.values()), self.price_of(item_name, server))
+                for key, (item_name, location_counts) in inventory['items'].items()}
+    
+    def item_row(self, entry, locations=DEFAULT_LOCATIONS, server=None):
+        """Price one aggregated inventory entry within the given slot classes.
+        
+        Returns (name, quantity, price, total, {slot class: count}) with
+        prices in copper, or None if the item has no price (on server, if
+        given) or isn't in any of the slot classes.
+        """
+        item_name, location_counts = entry
+        counts = {location: count for location, count in location_counts.items() if location in locations}
+        quantity = sum(counts.values())
+        if not quantity:
+            return None
+        item_price = self.price_of(item_name, server)
+        if item_price is None:
+            return None
+        return item_name, quantity, item_price, item_price * quantity, counts
+    
+    def value_inventory(self, inventory_file, locations=DEFAULT_LOCATIONS):
+        """Value one inventory file.
+        
+        Returns a dict with the file, character and server (when the name
+        follows the inventory file convention), the priced items, totals per
+        slot class, the grand total and any rows that couldn't be parsed.
+        All prices are in copper.
+        """
+        inventory = self.load_inventory(inventory_file)
+        items = []
+        location_totals = {}
+        total_copper = 0
+        server = inventory['server']
+        with PROFILER.phase('price'):
+            for entry in inventory['items'].values():
+                row = self.item_row(entry, locations, server)
+                if row is None:
+                    continue
+                item_name, quantity, item_price, item_total, counts = row
+                total_copper += item_total
+                for location, count in counts.items():
+                    location_totals[location] = location_totals.get(location, 0) + item_price * count
+                items.append({
+                    'name': item_name,
+                    'quantity': quantity,
+                    'unit_price': item_price,
+                    'total': item_total,
+                    'locations': counts
+                })
+        
+        return {
+            'file': inventory['file'],
+            'character': inventory['character'],
+            'server': inventory['server'],
+            'items': items,
+            'location_totals': location_totals,
+            'total': total_copper,
+            'bad_rows': inventory['bad_rows']
+        }
+
+def find_inventory_files(eq_path, servers=None, recursive=False):
+    """Find every CharacterName_server-Inventory.txt file under eq_path.
+    
+    Only files for known servers (the short names in SERVER_NAME_MAPPINGS)
+    are returned, optionally limited to the given short server names.
+    """
+    known_servers = {server.casefold() for server in (servers or SERVER_NAME_MAPPINGS.values())}
+    if recursive:
+        candidates = (os.path.join(folder, name) for folder, _, names in os.walk(eq_path) for name in names)
+    else:
+        candidates = (entry.path for entry in os.scandir(eq_path) if entry.is_file())
+    
+    inventory_files = []
+    for path in candidates:
+        parsed = parse_inventory_filename(path)
+        if parsed and parsed[1].casefold() in known_servers:
+            inventory_files.append(path)
+    return sorted(inventory_files)
+
+# Per-process engine and slot classes for sweep workers, set once by _init_sweep_worker
+_sweep_engine = None
+_sweep_locations = DEFAULT_LOCATIONS
+
+def _init_sweep_worker(item_prices, locations=DEFAULT_LOCATIONS, cache_file=None, server_overrides=None):
+    """Give each worker process its own read-only engine over the shared price table"""
+    global _sweep_engine, _sweep_locations
+    inventory_cache = InventoryCache(DiskInventoryCache(cache_file)) if cache_file else None
+    server_prices = ServerPriceLayers(server_overrides) if server_overrides else None
+    _sweep_engine = ValuationEngine(item_prices, inventory_cache=inventory_cache, server_prices=server_prices)
+    _sweep_locations = locations
+
+def _sweep_value(inventory_file):
+    """Value one file in a worker, returning (result, error) so one bad file doesn't stop the sweep"""
+    try:
+        return _sweep_engine.value_inventory(inventory_file, _sweep_locations), None
+    except (OSError, ValueError, csv.Error, sqlite3.Error) as e:
+        return None, f"{inventory_file}: {e}"
+
+def sweep_inventories(inventory_files, item_prices, workers=None, locations=DEFAULT_LOCATIONS,
+                      cache_file=None, server_overrides=None):
+    """Value many inventory files in parallel and total them per character and server.
+    
+    The price table and any per-server overrides ({server: {name: copper}})
+    are sent to each worker process once when it starts rather than with
+    every file. Returns a dict with per-character totals,
+    per-server totals, the grand total and any per-file errors.
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(inventory_files) < 2:
+        _init_sweep_worker(item_prices, locations, cache_file, server_overrides)
+        outcomes = [_sweep_value(path) for path in inventory_files]
+    else:
+        chunksize = max(1, len(inventory_files) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_sweep_worker,
+                                 initargs=(item_prices, locations, cache_file, server_overrides)) as executor:
+            outcomes = list(executor.map(_sweep_value, inventory_files, chunksize=chunksize))
+    
+    characters = []
+    server_totals = {}
+    errors = []
+    for result, error in outcomes:
+        if error:
+            errors.append(error)
+            continue
+        characters.append({
+            'character': result['character'],
+            'server': result['server'],
+            'file': result['file'],
+            'items': len(result['items']),
+            'total': result['total'],
+            'bad_rows': len(result['bad_rows'])
+        })
+        server_totals[result['server']] = server_totals.get(result['server'], 0) + result['total']
+    
+    return {
+        'characters': characters,
+        'servers': dict(sorted(server_totals.items())),
+        'grand_total': sum(server_totals.values()),
+        'errors': errors
+    }
+
+def atomic_write(path, text):
+    """Write text to path so readers only ever see the old or the new contents.
+    
+    The data goes to a temp file in the same folder, is fsynced, then
+    moved over path with os.replace.
+    """
+    folder = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=folder, prefix=os.path.basename(path) + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8', newline='') as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+class PriceFile:
+    """JSON price list on disk with a backup and a manifest.
+    
+    Every save keeps the previous file as `<file>.bak` and records the
+    SHA-256 of both in `<file>.manifest`. If the main file is missing or
+    can't be parsed, load() rolls back to the backup instead of starting
+    over with the default prices.
+    """
+    
+    def __init__(self, path):
+        self.path = path
+        self.backup_path = path + ".bak"
+        self.manifest_path = path + ".manifest"
+    
+    def read_manifest(self):
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+    
+    def read_prices(self, path, known_hashes=None):
+        """Return the price dict in path, or None if it is missing or corrupt"""
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            if known_hashes and hashlib.sha256(data).hexdigest() not in known_hashes:
+                return None
+            prices = json.loads(data)
+        except (OSError, ValueError):
+            return None
+        return prices if isinstance(prices, dict) else None
+    
+    def load(self):
+        """Return the saved prices, rolled back to the backup if needed.
+        
+        Returns None if there is no usable file. A corrupt file without a
+        usable backup is kept as `<file>.corrupt` rather than overwritten.
+        """
+        prices = self.read_prices(self.path)
+        if prices is not None:
+            return prices
+        
+        manifest = self.read_manifest()
+        known_hashes = {manifest.get('sha256'), manifest.get('backup_sha256')} - {None}
+        prices = self.read_prices(self.backup_path, known_hashes)
+        if prices is not None:
+            print(f"{self.path} is missing or corrupt, restoring the last good copy from {self.backup_path}")
+            with open(self.backup_path, 'r', encoding='utf-8') as f:
+                atomic_write(self.path, f.read())
+            return prices
+        
+        if os.path.exists(self.path):
+            print(f"{self.path} is corrupt and has no usable backup, keeping it as {self.path}.corrupt")
+            os.replace(self.path, self.path + ".corrupt")
+        return None
+    
+    def save(self, item_prices):
+        with PROFILER.phase('serialize'):
+            text = json.dumps(plain_prices(item_prices), indent=4)
+        PROFILER.count('items saved', len(item_prices))
+        data = text.encode('utf-8')
+        
+        with PROFILER.phase('write'):
+            # Copy the current file to the backup, leaving it in place so the list never
+            # disappears; a corrupt current file doesn't replace a good backup
+            backup_sha256 = self.read_manifest().get('backup_sha256')
+            try:
+                with open(self.path, 'rb') as f:
+                    current = f.read()
+                if isinstance(json.loads(current), dict):
+                    atomic_write(self.backup_path, current.decode('utf-8'))
+                    backup_sha256 = hashlib.sha256(current).hexdigest()
+            except (OSError, ValueError):
+                pass
+            
+            # The manifest goes first: until the main file is replaced it still
+            # holds the backed up contents, which the manifest knows
+            atomic_write(self.manifest_path, json.dumps({
+                'sha256': hashlib.sha256(data).hexdigest(),
+                'size': len(data),
+                'backup_sha256': backup_sha256
+            }))
+            atomic_write(self.path, text)
+
+class SQLitePriceStore:
+    """Price list kept in an SQLite database instead of one JSON file.
+    
+    Item names are unique case-insensitively (COLLATE NOCASE), matching
+    the duplicate rules of the price index. Edits are written per row, so
+    changing one price doesn't rewrite the whole list. The connection may
+    be used from a background thread; calls are serialized with a lock.
+    """
+    
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        with self.connection:
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS items ("
+                "name TEXT NOT NULL PRIMARY KEY COLLATE NOCASE, "
+                "price INTEGER NOT NULL)"
+            )
+    
+    def is_empty(self):
+        with self.lock:
+            return self.connection.execute("SELECT 1 FROM items LIMIT 1").fetchone() is None
+    
+    def load(self):
+        """Return the whole price list as a dict of name -> copper"""
+        with self.lock:
+            return dict(self.connection.execute("SELECT name, price FROM items"))
+    
+    def upsert_many(self, items):
+        """Insert or update (name, price) pairs in one transaction"""
+        with self.lock, self.connection:
+            self.connection.executemany(
+                "INSERT INTO items (name, price) VALUES (?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET price = excluded.price",
+                items
+            )
+    
+    def delete_many(self, names):
+        """Delete items by name (case-insensitive) in one transaction"""
+        with self.lock, self.connection:
+            self.connection.executemany("DELETE FROM items WHERE name = ?", ((name,) for name in names))
+    
+    def apply_changes(self, item_prices, changed_items):
+        """Write changed names to the store in one transaction.
+        
+        Names still in item_prices are upserted with their current price,
+        the rest are deleted.
+        """
+        PROFILER.count('items saved', len(changed_items))
+        with PROFILER.phase('write'), self.lock, self.connection:
+            for name in changed_items:
+                if name in item_prices:
+                    self.connection.execute(
+                        "INSERT INTO items (name, price) VALUES (?, ?) "
+                        "ON CONFLICT(name) DO UPDATE SET price = excluded.price",
+                        (name, item_prices[name])
+                    )
+                else:
+                    self.connection.execute("DELETE FROM items WHERE name = ?", (name,))
+    
+    def replace_all(self, item_prices):
+        """Replace the stored list with item_prices in one transaction"""
+        PROFILER.count('items saved', len(item_prices))
+        with PROFILER.phase('write'), self.lock, self.connection:
+            self.connection.execute("DELETE FROM items")
+            self.connection.executemany("INSERT OR IGNORE INTO items (name, price) VALUES (?, ?)",
+                                        item_prices.items())
+    
+    def import_prices(self, saved_items):
+        """One-time import of a saved {name: price} list"""
+        with self.lock, self.connection:
+            self.connection.executemany("INSERT OR IGNORE INTO items (name, price) VALUES (?, ?)",
+                                        saved_items.items())
+        return len(saved_items)
+    
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+class SnapshotStore:
+    """Append-only history of valuations in SQLite.
+    
+    A snapshot records when a character's inventory was valued and its
+    value over all slots; its items are stored as changes against the
+    character's previous snapshot (new quantity, unit price and quantity
+    change), so appending costs one row per item that changed. The latest
+    state of each character has its own table, so the next append doesn't
+    replay history, and snapshots are indexed on (character, server,
+    time) so diffs and history queries stay fast over months of data.
+    """
+    
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.states = {}
+        self.connection = sqlite3.connect(path, timeout=10, check_same_thread=False)
+        with self.connection:
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS snapshots ("
+                "id INTEGER PRIMARY KEY, "
+                "character TEXT NOT NULL, "
+                "server TEXT NOT NULL, "
+                "taken_at REAL NOT NULL, "
+                "total INTEGER NOT NULL)"
+            )
+            self.connection.execute(
+                "CREATE INDEX IF NOT EXISTS snapshots_character_time ON snapshots (character, server, taken_at)"
+            )
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS snapshot_items ("
+                "snapshot_id INTEGER NOT NULL, "
+                "key TEXT NOT NULL, "
+                "name TEXT NOT NULL, "
+                "quantity INTEGER NOT NULL, "
+                "unit_price INTEGER, "
+                "quantity_change INTEGER NOT NULL, "
+                "PRIMARY KEY (snapshot_id, key)) WITHOUT ROWID"
+            )
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS latest_items ("
+                "character TEXT NOT NULL, "
+                "server TEXT NOT NULL, "
+                "key TEXT NOT NULL, "
+                "name TEXT NOT NULL, "
+                "quantity INTEGER NOT NULL, "
+                "unit_price INTEGER, "
+                "PRIMARY KEY (character, server, key)) WITHOUT ROWID"
+            )
+    
+    def state(self, character, server):
+        """Return (snapshot id, total, {key: (name, quantity, unit price)}) of the latest snapshot.
+        
+        The state is cached, but only used while it is still the latest
+        snapshot: another process (e.g. `main.py value --history` while the
+        GUI is open) may have appended to the same file since.
+        """
+        latest_id = self.connection.execute(
+            "SELECT MAX(id) FROM snapshots WHERE character = ? AND server = ?", (character, server)
+        ).fetchone()[0]
+        state = self.states.get((character, server))
+        if state is None or state[0] != latest_id:
+            row = self.connection.execute("SELECT total FROM snapshots WHERE id = ?", (latest_id,)).fetchone()
+            items = {key: (name, quantity, unit_price) for key, name, quantity, unit_price in self.connection.execute(
+                "SELECT key, name, quantity, unit_price FROM latest_items WHERE character = ? AND server = ?",
+                (character, server)
+            )}
+            state = self.states[(character, server)] = (latest_id, row[0] if row else 0, items)
+        return state
+    
+    def latest_id(self, character, server):
+        """Return the id of the character's latest snapshot, or None"""
+        with self.lock:
+            return self.state(character, server)[0]
+    
+    def append(self, character, server, items, taken_at=None):
+        """Record a snapshot of items, {key: (name, quantity, unit price or None)}.
+        
+        Only items whose quantity or price changed since the previous
+        snapshot are written. Returns the new snapshot id, or None if
+        nothing changed.
+        """
+        with self.lock, self.connection:
+            # Hold the write lock from reading the latest state until the snapshot is in,
+            # so another process can't append in between
+            self.connection.execute("BEGIN IMMEDIATE")
+            snapshot_id, total, previous = self.state(character, server)
+            changes = []
+            for key, (item_name, quantity, unit_price) in items.items():
+                old = previous.get(key)
+                if old is None or old[1] != quantity or old[2] != unit_price:
+                    changes.append((key, item_name, quantity, unit_price, quantity - (old[1] if old else 0)))
+            for key, (item_name, quantity, unit_price) in previous.items():
+                if key not in items:
+                    changes.append((key, item_name, 0, unit_price, -quantity))
+            if not changes and snapshot_id is not None:
+                return None
+            
+            # Keep the total current from the changed items alone
+            for key, item_name, quantity, unit_price, _ in changes:
+                old = previous.get(key)
+                if old is not None and old[2] is not None:
+                    total -= old[1] * old[2]
+                if unit_price is not None:
+                    total += quantity * unit_price
+            
+            snapshot_id = self.connection.execute(
+                "INSERT INTO snapshots (character, server, taken_at, total) VALUES (?, ?, ?, ?)",
+                (character, server, taken_at if taken_at is not None else time.time(), total)
+            ).lastrowid
+            self.connection.executemany(
+                "INSERT INTO snapshot_items (snapshot_id, key, name, quantity, unit_price, quantity_change) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                ((snapshot_id,) + change for change in changes)
+            )
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO latest_items (character, server, key, name, quantity, unit_price) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                ((character, server, key, item_name, quantity, unit_price)
+                 for key, item_name, quantity, unit_price, _ in changes if quantity)
+            )
+            self.connection.executemany(
+                "DELETE FROM latest_items WHERE character = ? AND server = ? AND key = ?",
+                ((character, server, key) for key, _, quantity, _, _ in changes if not quantity)
+            )
+            
+            for key, item_name, quantity, unit_price, _ in changes:
+                if quantity:
+                    previous[key] = (item_name, quantity, unit_price)
+                else:
+                    previous.pop(key, None)
+            self.states[(character, server)] = (snapshot_id, total, previous)
+            return snapshot_id
+    
+    def snapshots(self, character, server, since=None, until=None):
+        """Return [(id, time, total)] for a character, oldest first, optionally within a time range"""
+        with self.lock:
+            return self.connection.execute(
+                "SELECT id, taken_at, total FROM snapshots WHERE character = ? AND server = ? "
+                "AND taken_at >= ? AND taken_at <= ? ORDER BY taken_at, id",
+                (character, server, since if since is not None else 0.0,
+                 until if until is not None else float('inf'))
+            ).fetchall()
+    
+    def diff(self, character, server, since_id, until_id=None):
+        """Report what changed for a character between two snapshots.
+        
+        Returns a dict with the time and total of both snapshots, the
+        items gained and lost as (name, quantity) pairs largest first, the
+        change in value and that change per hour, in copper. until_id
+        defaults to the latest snapshot.
+        """
+        with self.lock:
+            if until_id is None:
+                until_id = self.state(character, server)[0]
+            since = self.connection.execute("SELECT taken_at, total FROM snapshots WHERE id = ?",
+                                            (since_id,)).fetchone()
+            until = self.connection.execute("SELECT taken_at, total FROM snapshots WHERE id = ?",
+                                            (until_id,)).fetchone()
+            if since is None or until is None:
+                raise ValueError(f"No such snapshot: {since_id if since is None else until_id}")
+            changes = self.connection.execute(
+                "SELECT MAX(i.name), SUM(i.quantity_change) FROM snapshot_items i "
+                "JOIN snapshots s ON s.id = i.snapshot_id "
+                "WHERE s.character = ? AND s.server = ? AND s.id > ? AND s.id <= ? "
+                "GROUP BY i.key HAVING SUM(i.quantity_change) != 0",
+                (character, server, since_id, until_id)
+            ).fetchall()
+        
+        hours = (until[0] - since[0]) / 3600
+        value_change = until[1] - since[1]
+        return {
+            'since': since[0],
+            'until': until[0],
+            'since_total': since[1],
+            'until_total': until[1],
+            'gained': sorted(((name, change) for name, change in changes if change > 0),
+                             key=itemgetter(1), reverse=True),
+            'lost': sorted(((name, -change) for name, change in changes if change < 0),
+                           key=itemgetter(1), reverse=True),
+            'value_change': value_change,
+            'per_hour': round(value_change / hours) if hours > 0 else None
+        }
+    
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+# Matches one part of a price such as "1p 2g 3s 4c"
+CURRENCY_PART_PATTERN = re.compile(r"(\d+)\s*([pgsc])", re.IGNORECASE)
+CURRENCY_UNITS = {'p': 1000, 'g': 100, 's': 10, 'c': 1}
+
+# How an imported price is merged with an existing item of the same name
+MERGE_POLICIES = ('keep', 'overwrite', 'max')
+
+def parse_currency(text):
+    """Convert a price like "1p 2g 3s 4c" or a plain copper amount to copper"""
+    text = str(text).strip()
+    if text.isdigit():
+        return int(text)
+    parts = CURRENCY_PART_PATTERN.findall(text)
+    if not parts or CURRENCY_PART_PATTERN.sub('', text).strip():
+        raise ValueError(f"invalid price: {text!r}")
+    return sum(int(amount) * CURRENCY_UNITS[unit.lower()] for amount, unit in parts)
+
+def iter_json_items(file, on_read=None, chunk_size=1 << 16):
+    """Stream a top-level JSON object as (key, value) pairs, or a list as (None, element).
+    
+    Only one member is decoded at a time, so a large dump is never held in
+    memory whole. on_read, if given, is called with the number of
+    characters read for each chunk.
+    """
+    decoder = json.JSONDecoder()
+    buffer, pos, eof = "", 0, False
+    
+    def fill():
+        nonlocal buffer, pos, eof
+        chunk = file.read(chunk_size)
+        if not chunk:
+            eof = True
+            return False
+        buffer, pos = buffer[pos:] + chunk, 0
+        if on_read:
+            on_read(len(chunk))
+        return True
+    
+    def peek():
+        """Skip whitespace and return the next character, or '' at the end"""
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos] in " \t\r\n":
+                pos += 1
+            if pos < len(buffer) or not fill():
+                return buffer[pos:pos + 1]
+    
+    def expect(chars):
+        nonlocal pos
+        char = peek()
+        if not char or char not in chars:
+            raise ValueError(f"invalid JSON: expected one of {chars!r}, found {char or 'end of file'!r}")
+        pos += 1
+        return char
+    
+    def value():
+        nonlocal pos
+        peek()
+        while True:
+            # A number cut off at the end of the buffer ("12." of "12.5") may continue in the next chunk,
+            # so only accept a value once the character after it has been read
+            try:
+                result, end = decoder.raw_decode(buffer, pos)
+                if eof or (end < len(buffer) and buffer[end] in " \t\r\n,:]}"):
+                    pos = end
+                    return result
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            fill()
+    
+    opening = peek()
+    if opening not in ("{", "["):
+        raise ValueError('expected a JSON object or a list of {"name": ..., "price": ...} objects')
+    pos += 1
+    closing = "}" if opening == "{" else "]"
+    if peek() == closing:
+        return
+    while True:
+        if opening == "{":
+            if peek() != '"':
+                raise ValueError("invalid JSON: expected a quoted name")
+            key = value()
+            expect(":")
+            yield key, value()
+        else:
+            yield None, value()
+        if expect("," + closing) == closing:
+            return
+
+def iter_price_entries(path, progress=None, bad_rows=None):
+    """Stream (name, copper) pairs from a CSV or JSON price list.
+    
+    CSV files have the item name in the first column and the price in the
+    second, with an optional header row, and are read one row at a time.
+    JSON files are either a {name: price} object, like the saved price
+    list, or a list of {"name": ..., "price": ...} objects, and are read
+    one entry at a time as well. Prices may be copper amounts or
+    "1p 2g 3s 4c" strings. progress, if given, is called with the fraction
+    of the file read so far; rows that can't be read are appended to
+    bad_rows as (row or entry number, reason).
+    """
+    total_size = os.path.getsize(path) or 1
+    
+    if path.lower().endswith('.json'):
+        chars_read = 0
+        
+        def on_read(count):
+            nonlocal chars_read
+            chars_read += count
+            if progress:
+                progress(min(1.0, chars_read / total_size))
+        
+        with open(path, 'r', encoding='utf-8') as f:
+            for entry_number, (name, price) in enumerate(iter_json_items(f, on_read), 1):
+                if name is None:
+                    name, price = (price.get('name'), price.get('price')) if isinstance(price, dict) else (None, None)
+                if not isinstance(name, str) or not name.strip():
+                    if bad_rows is not None:
+                        bad_rows.append((entry_number, "missing item name"))
+                    continue
+                try:
+                    yield name.strip(), parse_currency(price)
+                except ValueError as e:
+                    if bad_rows is not None:
+                        bad_rows.append((entry_number, str(e)))
+        if progress:
+            progress(1.0)
+        return
+    
+    bytes_read = 0
+    with open(path, 'r', newline='', encoding='utf-8-sig') as f:
+        for row_number, row in enumerate(csv.reader(f), 1):
+            bytes_read += sum(len(field) + 1 for field in row)
+            if progress and row_number % 5000 == 0:
+                progress(min(1.0, bytes_read / total_size))
+            if len(row) < 2 or not row[0].strip():
+                continue
+            try:
+                yield row[0].strip(), parse_currency(row[1])
+            except ValueError as e:
+                # A non-numeric first row is the header
+                if row_number > 1 and bad_rows is not None:
+                    bad_rows.append((row_number, str(e)))
+    if progress:
+        progress(1.0)
+
+def plan_price_merge(item_prices, price_index, entries, policy='keep'):
+    """Work out how imported entries change a price list, without changing it.
+    
+    Names are matched case-insensitively through price_index, like the
+    duplicate check when adding an item; an existing item keeps its stored
+    spelling. policy decides what happens when an item already exists:
+    'keep' leaves it, 'overwrite' takes the imported price and 'max' keeps
+    the higher of the two. Duplicates within the import follow the same
+    rules. Returns ({name: copper} to apply, {name: copper} of new items,
+    counts of added/updated/unchanged entries).
+    """
+    if policy not in MERGE_POLICIES:
+        raise ValueError(f"unknown merge policy: {policy}")
+    
+    changes = {}
+    added = {}
+    stats = {'added': 0, 'updated': 0, 'unchanged': 0}
+    for name, price in entries:
+        key = name.casefold()
+        existing = price_index.get(key) or added.get(key)
+        if existing is None:
+            added[key] = name
+            changes[name] = price
+            stats['added'] += 1
+            continue
+        
+        current = changes.get(existing, item_prices.get(existing))
+        if policy == 'keep' or (policy == 'max' and price <= current) or price == current:
+            stats['unchanged'] += 1
+            continue
+        if existing in item_prices and existing not in changes:
+            stats['updated'] += 1
+        changes[existing] = price
+    
+    return changes, {name: changes[name] for name in added.values()}, stats
+
+def export_prices(item_prices, path, progress=None):
+    """Write a price list to CSV (name, copper) or JSON, replacing path atomically"""
+    if path.lower().endswith('.json'):
+        atomic_write(path, json.dumps(plain_prices(item_prices), indent=4))
+        if progress:
+            progress(1.0)
+        return len(item_prices)
+    
+    folder = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=folder, prefix=os.path.basename(path) + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(['name', 'price'])
+            for count, item_name in enumerate(sorted(item_prices, key=str.casefold), 1):
+                writer.writerow([item_name, item_prices[item_name]])
+                if progress and count % 5000 == 0:
+                    progress(count / len(item_prices))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    if progress:
+        progress(1.0)
+    return len(item_prices)
+
+class PriceFeed:
+    """Pulls price updates from a feed URL or a local file or folder.
+    
+    Fetches are conditional (ETag/Last-Modified, or mtime and size), so an
+    unchanged feed is never parsed; commit() records what was applied.
+    """
+    
+    def __init__(self, source, state_file=FEED_STATE_FILE, timeout=30):
+        self.source = source
+        self.state_file = state_file
+        self.timeout = timeout
+    
+    def is_remote(self):
+        return urllib.parse.urlparse(self.source).scheme in ('http', 'https')
+    
+    def local_path(self):
+        if self.source.startswith('file://'):
+            return urllib.request.url2pathname(urllib.parse.urlparse(self.source).path)
+        return self.source
+    
+    def load_state(self):
+        """Return the validators of the last applied fetch, if it was from this source"""
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return state if isinstance(state, dict) and state.get('source') == self.source else {}
+    
+    def commit(self, state):
+        """Record a fetch as applied so the next one can be conditional"""
+        atomic_write(self.state_file, json.dumps(dict(state, source=self.source)))
+    
+    def fetch_local(self, previous):
+        path = self.local_path()
+        if os.path.isdir(path):
+            paths = [os.path.join(path, name) for name in sorted(os.listdir(path))
+                     if name.lower().endswith(('.csv', '.json'))]
+        else:
+            paths = [path]
+        files = {}
+        for file_path in paths:
+            stat = os.stat(file_path)
+            files[os.path.basename(file_path)] = [stat.st_mtime_ns, stat.st_size]
+        if files == previous.get('files'):
+            return None
+        return paths, {'files': files}, []
+    
+    def fetch_remote(self, previous):
+        request = urllib.request.Request(self.source)
+        if previous.get('etag'):
+            request.add_header('If-None-Match', previous['etag'])
+        if previous.get('last_modified'):
+            request.add_header('If-Modified-Since', previous['last_modified'])
+        try:
+            response = urllib.request.urlopen(request, timeout=self.timeout)
+        except urllib.error.HTTPError as e:
+            if e.code == 304:
+                return None
+            raise
+        
+        # Keep the extension so iter_price_entries reads it in the right format
+        with response:
+            content_type = response.headers.get('Content-Type', '')
+            is_json = urllib.parse.urlparse(self.source).path.lower().endswith('.json') or 'json' in content_type
+            fd, tmp_path = tempfile.mkstemp(prefix="eq_price_feed.", suffix=".json" if is_json else ".csv")
+            sha256 = hashlib.sha256()
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    for chunk in iter(lambda: response.read(1 << 16), b''):
+                        sha256.update(chunk)
+                        f.write(chunk)
+            except BaseException:
+                os.remove(tmp_path)
+                raise
+            state = {'etag': response.headers.get('ETag'),
+                     'last_modified': response.headers.get('Last-Modified'),
+                     'sha256': sha256.hexdigest()}
+        
+        # Servers without validators resend everything; a matching hash still skips the merge
+        if state['sha256'] == previous.get('sha256'):
+            os.remove(tmp_path)
+            return [], state, []
+        return [tmp_path], state, [tmp_path]
+    
+    def check(self, item_prices, price_index, policy='overwrite', bad_rows=None):
+        """Fetch the feed and work out its changes without applying them.
+        
+        Returns None if the feed hasn't changed since the last commit(),
+        otherwise (changes, added names, stats, state) like
+        plan_price_merge plus the state to commit once the changes are
+        saved. Safe to run on a worker thread; nothing is modified.
+        """
+        previous = self.load_state()
+        fetched = self.fetch_remote(previous) if self.is_remote() else self.fetch_local(previous)
+        if fetched is None:
+            return None
+        
+        paths, state, temp_paths = fetched
+        try:
+            entries = (entry for path in paths for entry in iter_price_entries(path, bad_rows=bad_rows))
+            changes, added, stats = plan_price_merge(item_prices, price_index, entries, policy)
+        finally:
+            for path in temp_paths:
+                os.remove(path)
+        return changes, added, stats, state
+
+class VirtualGrid:
+    """A ttk.Treeview that only holds the rows currently on screen.
+    
+    The rows live in a plain Python list (`rows`) and `format_rows` turns a
+    list of rows into the values shown in the tree. Tk only ever holds `height`
+    items, which are reused as the grid scrolls, so opening a grid over
+    tens of thousands of rows costs the same as opening one over a page.
+    Call refresh() after changing `rows`; redraws are coalesced with
+    after_idle so a burst of changes repaints once.
+    """
+    
+    def __init__(self, parent, columns, height, format_rows):
+        self.tree = ttk.Treeview(parent, columns=columns, show='headings', height=height)
+        self.scrollbar = ttk.Scrollbar(parent, orient=tk.VERTICAL, command=self.yview)
+        self.height = height
+        self.format_rows = format_rows
+        self.rows = []
+        self.offset = 0
+        self.item_ids = []
+        self.render_pending = False
+        
+        # Scroll with the mouse wheel (Windows/macOS and X11)
+        self.tree.bind('<MouseWheel>', lambda event: self.scroll(-1 if event.delta > 0 else 1))
+        self.tree.bind('<Button-4>', lambda event: self.scroll(-1))
+        self.tree.bind('<Button-5>', lambda event: self.scroll(1))
+    
+    def set_rows(self, rows):
+        """Replace the rows and scroll back to the top"""
+        self.rows = rows
+        self.offset = 0
+        self.refresh()
+    
+    def refresh(self):
+        """Schedule a redraw of the visible rows"""
+        if not self.render_pending:
+            self.render_pending = True
+            self.tree.after_idle(self.render)
+    
+    def render(self):
+        self.render_pending = False
+        self.offset = max(0, min(self.offset, len(self.rows) - self.height))
+        visible = self.rows[self.offset:self.offset + self.height]
+        
+        # Grow or shrink the pool of Tk items to the number of visible rows
+        while len(self.item_ids) < len(visible):
+            self.item_ids.append(self.tree.insert('', 'end'))
+        while len(self.item_ids) > len(visible):
+            self.tree.delete(self.item_ids.pop())
+        
+        for item_id, values in zip(self.item_ids, self.format_rows(visible)):
+            self.tree.item(item_id, values=values)
+        
+        if self.rows:
+            self.scrollbar.set(self.offset / len(self.rows),
+                               min(1.0, (self.offset + self.height) / len(self.rows)))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+    
+    def scroll(self, amount):
+        """Scroll by a number of rows"""
+        self.tree.selection_remove(self.tree.selection())
+        self.offset += amount
+        self.refresh()
+        return 'break'
+    
+    def yview(self, *args):
+        """Scrollbar command: ('moveto', fraction) or ('scroll', n, 'units'|'pages')"""
+        if args[0] == 'moveto':
+            self.tree.selection_remove(self.tree.selection())
+            self.offset = int(float(args[1]) * len(self.rows))
+            self.refresh()
+        elif args[0] == 'scroll':
+            amount = int(args[1])
+            self.scroll(amount * self.height if args[2] == 'pages' else amount)
+    
+    def row_at(self, y):
+        """Return the row under a y coordinate, or None"""
+        item_id = self.tree.identify_row(y)
+        if item_id not in self.item_ids:
+            return None
+        index = self.offset + self.item_ids.index(item_id)
+        return self.rows[index] if index < len(self.rows) else None
+
+class DebouncedSaver:
+    """Coalesces bursts of saves into one write on a background thread.
+    
+    schedule() can be called after every edit; once no new edit has come
+    in for `delay` ms, `prepare(changed_items)` runs on the Tk thread to
+    snapshot what needs writing and returns a callable that does the
+    write off the UI thread. changed_items is the union of the names
+    passed since the last write, or None if any caller asked for a full
+    save. A failed write is reported from an after() poll as soon as it
+    happens.
+    """
+    
+    def __init__(self, root, prepare, delay=500, interval=100):
+        self.root = root
+        self.prepare = prepare
+        self.delay = delay
+        self.interval = interval
+        self.after_id = None
+        self.changed_items = set()
+        self.jobs = queue.Queue()
+        self.errors = queue.Queue()
+        self.polling = False
+        self.thread = threading.Thread(target=self.run, name="DebouncedSaver", daemon=True)
+        self.thread.start()
+    
+    def schedule(self, changed_items=None):
+        if changed_items is None or self.changed_items is None:
+            self.changed_items = None
+        else:
+            self.changed_items.update(changed_items)
+        if self.after_id is not None:
+            self.root.after_cancel(self.after_id)
+        self.after_id = self.root.after(self.delay, self.submit)
+    
+    def submit(self):
+        """Snapshot the pending changes and hand the write to the worker"""
+        self.after_id = None
+        changed_items, self.changed_items = self.changed_items, set()
+        self.jobs.put(self.prepare(changed_items))
+        if not self.polling:
+            self.polling = True
+            self.root.after(self.interval, self.poll)
+    
+    def poll(self):
+        """Report failed writes on the Tk thread until the worker is idle"""
+        self.report_error()
+        if self.jobs.unfinished_tasks:
+            self.root.after(self.interval, self.poll)
+        else:
+            self.polling = False
+            self.report_error()
+    
+    def run(self):
+        while True:
+            job = self.jobs.get()
+            try:
+                with PROFILER.operation("Save"):
+                    job()
+            except Exception as e:
+                self.errors.put(e)
+            finally:
+                self.jobs.task_done()
+    
+    def flush(self):
+        """Write anything pending and wait for it, e.g. before the app exits"""
+        if self.after_id is not None:
+            self.root.after_cancel(self.after_id)
+            self.submit()
+        self.jobs.join()
+        self.report_error()
+    
+    def report_error(self):
+        while not self.errors.empty():
+            error = self.errors.get_nowait()
+            messagebox.showerror("Error", f"Failed to save items: {str(error)}")
+
+class BackgroundTask:
+    """Runs work(progress) on a worker thread and reports back on the Tk main loop.
+    
+    work gets a progress(fraction) callback it may call from the worker.
+    on_progress, on_done(result) and on_error(exception) are always called
+    on the Tk thread, from an after() poll.
+    """
+    
+    def __init__(self, root, work, on_done, on_error=None, on_progress=None, interval=100):
+        self.root = root
+        self.work = work
+        self.on_done = on_done
+        self.on_error = on_error
+        self.on_progress = on_progress
+        self.interval = interval
+        self.progress = None
+        self.result = None
+        self.error = None
+        self.finished = threading.Event()
+        threading.Thread(target=self.run, name="BackgroundTask", daemon=True).start()
+        self.root.after(self.interval, self.poll)
+    
+    def report_progress(self, fraction):
+        self.progress = fraction
+    
+    def run(self):
+        try:
+            self.result = self.work(self.report_progress)
+        except Exception as e:
+            self.error = e
+        finally:
+            self.finished.set()
+    
+    def poll(self):
+        if self.on_progress is not None and self.progress is not None:
+            self.on_progress(self.progress)
+        if not self.finished.is_set():
+            self.root.after(self.interval, self.poll)
+        elif self.error is not None:
+            if self.on_error is not None:
+                self.on_error(self.error)
+            else:
+                messagebox.showerror("Error", f"An error occurred: {str(self.error)}")
+        else:
+            self.on_done(self.result)
 
 class AddItemDialog:
-    def __init__(self, parent, item_prices, on_save):
+    # Server choice meaning the shared price list rather than one server's overrides
+    ALL_SERVERS = "All servers"
+    
+    def __init__(self, parent, item_prices, price_index, on_save, server_prices=None, on_server_save=None):
         self.dialog = tk.Toplevel(parent)
         self.dialog.title("Add New Item")
         self.dialog.geometry("400x300")
@@ -14,7 +2189,10 @@ class AddItemDialog:
         self.dialog.grab_set()
         
         self.item_prices = item_prices
+        self.price_index = price_index
         self.on_save = on_save
+        self.server_prices = server_prices
+        self.on_server_save = on_server_save
         
         # Create main frame
         main_frame = ttk.Frame(self.dialog, padding="10")
@@ -44,11 +2222,21 @@ class AddItemDialog:
         ttk.Entry(price_frame, textvariable=self.copper_var, width=5).pack(side=tk.LEFT, padx=5)
         ttk.Label(price_frame, text="c").pack(side=tk.LEFT, padx=2)
         
+        # Server the price applies to; a single server's price overrides the shared one there
+        self.server_var = tk.StringVar(value=self.ALL_SERVERS)
+        if server_prices is not None:
+            ttk.Label(main_frame, text="Server:").grid(row=2, column=0, sticky=tk.W, pady=5)
+            ttk.Combobox(main_frame, textvariable=self.server_var, state='readonly', width=20,
+                         values=[self.ALL_SERVERS] + EQ_SERVERS).grid(row=2, column=1, sticky=tk.W, padx=5)
+        
         # Buttons
         button_frame = ttk.Frame(main_frame)
-        button_frame.grid(row=2, column=0, columnspan=2, pady=20)
+        button_frame.grid(row=3, column=0, columnspan=2, pady=20)
         
         ttk.Button(button_frame, text="Save", command=self.save_item).pack(side=tk.LEFT, padx=5)
+        if server_prices is not None:
+            ttk.Button(button_frame, text="Remove Server Price",
+                       command=self.clear_server_price).pack(side=tk.LEFT, padx=5)
         ttk.Button(button_frame, text="Cancel", command=self.dialog.destroy).pack(side=tk.LEFT, padx=5)
     
     def save_item(self):
@@ -59,12 +2247,6 @@ class AddItemDialog:
                 messagebox.showerror("Error", "Please enter an item name!")
                 return
             
-            # Check for case-insensitive duplicates
-            for existing_item in self.item_prices.keys():
-                if name.lower() == existing_item.lower():
-                    messagebox.showerror("Error", f"An item with this name already exists: {existing_item}")
-                    return
-            
             # Convert price to copper
             plat = int(self.plat_var.get() or "0")
             gold = int(self.gold_var.get() or "0")
@@ -73,18 +2255,52 @@ class AddItemDialog:
             
             total_copper = (plat * 1000) + (gold * 100) + (silver * 10) + copper
             
-            # Save to price list
+            # A server price may override an item already in the shared list
+            existing_item = self.price_index.get(name.casefold())
+            server = self.server_var.get()
+            if server != self.ALL_SERVERS:
+                name = existing_item or name
+                self.server_prices.set_price(server, name, total_copper)
+                self.on_server_save([name])
+                messagebox.showinfo("Success", f"Set the {server} price of {name}!")
+                self.dialog.destroy()
+                return
+            
+            # Check for case-insensitive duplicates
+            if existing_item is not None:
+                messagebox.showerror("Error", f"An item with this name already exists: {existing_item}")
+                return
+            
+            # Save to price list and keep the lookup index in sync
             self.item_prices[name] = total_copper
-            self.on_save()
+            self.price_index[name.casefold()] = name
+            self.on_save([name])
             
             messagebox.showinfo("Success", f"Added {name} to price list!")
             self.dialog.destroy()
             
         except ValueError:
             messagebox.showerror("Error", "Please enter valid numbers for the price!")
+    
+    def clear_server_price(self):
+        """Make the item use the shared price again on the selected server"""
+        name = self.item_name.get().strip()
+        server = self.server_var.get()
+        if not name or server == self.ALL_SERVERS:
+            messagebox.showerror("Error", "Please enter an item name and select a server!")
+            return
+        
+        override = self.server_prices.get(server, name)
+        if override is None:
+            messagebox.showerror("Error", f"{name} has no {server} price.")
+            return
+        self.server_prices.clear_price(server, name)
+        self.on_server_save([override[0]])
+        messagebox.showinfo("Success", f"{override[0]} uses the shared price on {server} again.")
+        self.dialog.destroy()
 
 class DeleteItemsDialog:
-    def __init__(self, parent, item_prices, on_delete):
+    def __init__(self, parent, item_prices, price_index, on_delete, get_search_index=None):
         self.dialog = tk.Toplevel(parent)
         self.dialog.title("Delete Items")
         self.dialog.geometry("600x400")
@@ -92,16 +2308,31 @@ class DeleteItemsDialog:
         self.dialog.grab_set()
         
         self.item_prices = item_prices
+        self.price_index = price_index
         self.on_delete = on_delete
+        self.get_search_index = get_search_index
         self.selected_items = set()
+        self.all_rows = []
         
         # Create main frame
         main_frame = ttk.Frame(self.dialog, padding="10")
         main_frame.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
         
-        # Create Treeview for items
+        # Search box; filters the list as you type
+        search_frame = ttk.Frame(main_frame)
+        search_frame.grid(row=0, column=0, columnspan=2, sticky=tk.W)
+        ttk.Label(search_frame, text="Search:").pack(side=tk.LEFT)
+        self.search_var = tk.StringVar()
+        self.filter_after_id = None
+        self.search_var.trace_add('write', lambda *args: self.schedule_filter())
+        search_entry = ttk.Entry(search_frame, textvariable=self.search_var, width=40)
+        search_entry.pack(side=tk.LEFT, padx=5)
+        search_entry.focus_set()
+        
+        # Create Treeview for items; rows are (item name, price) pairs
         columns = ('Select', 'Item Name', 'Price')
-        self.tree = ttk.Treeview(main_frame, columns=columns, show='headings', height=15)
+        self.grid = VirtualGrid(main_frame, columns, 15, self.format_rows)
+        self.tree = self.grid.tree
         
         # Define headings
         self.tree.heading('Select', text='Select')
@@ -113,20 +2344,16 @@ class DeleteItemsDialog:
         self.tree.column('Item Name', width=250)
         self.tree.column('Price', width=250)
         
-        # Add scrollbar
-        scrollbar = ttk.Scrollbar(main_frame, orient=tk.VERTICAL, command=self.tree.yview)
-        self.tree.configure(yscrollcommand=scrollbar.set)
-        
         # Grid the tree and scrollbar
-        self.tree.grid(row=0, column=0, columnspan=2, pady=10, sticky='nsew')
-        scrollbar.grid(row=0, column=2, sticky='ns')
+        self.tree.grid(row=1, column=0, columnspan=2, pady=10, sticky='nsew')
+        self.grid.scrollbar.grid(row=1, column=2, sticky='ns')
         
         # Bind click event for checkbox column
         self.tree.bind('<ButtonRelease-1>', self.on_click)
         
         # Buttons
         button_frame = ttk.Frame(main_frame)
-        button_frame.grid(row=1, column=0, columnspan=2, pady=20)
+        button_frame.grid(row=2, column=0, columnspan=2, pady=10)
         
         self.delete_button = ttk.Button(button_frame, text="Delete Selected Items", 
                                       command=self.confirm_delete, state='disabled')
@@ -135,15 +2362,57 @@ class DeleteItemsDialog:
         
         # Configure grid weights
         main_frame.columnconfigure(0, weight=1)
-        main_frame.rowconfigure(0, weight=1)
+        main_frame.rowconfigure(1, weight=1)
         
         # Populate the tree
         self.populate_tree()
     
     def populate_tree(self):
-        for item_name, price in sorted(self.item_prices.items()):
-            formatted_price = self.format_currency(price)
-            self.tree.insert('', 'end', values=('☐', item_name, formatted_price))
+        """Show the whole list in name order, waiting for the search index if it is still building"""
+        if self.get_search_index is None:
+            self.all_rows = sorted(self.item_prices.items())
+        else:
+            search_index = self.get_search_index()
+            if search_index is None:
+                self.dialog.after(100, self.populate_tree)
+                return
+            self.all_rows = PriceListRows(search_index, self.item_prices)
+        self.apply_filter()
+    
+    def schedule_filter(self):
+        """Filter once typing pauses rather than on every keystroke"""
+        if self.filter_after_id is not None:
+            self.dialog.after_cancel(self.filter_after_id)
+        self.filter_after_id = self.dialog.after(150, self.apply_filter)
+    
+    def apply_filter(self):
+        """Show only the items matching the search box"""
+        self.filter_after_id = None
+        query = self.search_var.get().strip()
+        if not query:
+            self.grid.set_rows(self.all_rows)
+            return
+        
+        search_index = self.get_search_index() if self.get_search_index else None
+        if search_index is not None:
+            # Short queries match the start of the name, longer ones anywhere in it; both come in name order
+            if len(query) < 3:
+                start, end = search_index.prefix_range(query)
+                name_ids = search_index.sorted_ids[start:end]
+            else:
+                name_ids = search_index.contains_sorted_ids(query)
+            rows = PriceListRows(search_index, self.item_prices, name_ids)
+        else:
+            # Index still building; fall back to a plain scan
+            query = query.casefold()
+            rows = [row for row in self.all_rows if query in row[0].casefold()]
+        self.grid.set_rows(rows)
+    
+    def format_rows(self, rows):
+        """Display values for a list of (item name, price) rows"""
+        prices = format_currency_column([price for _, price in rows])
+        return [('☑' if item_name in self.selected_items else '☐', item_name, price)
+                for (item_name, _), price in zip(rows, prices)]
     
     def on_click(self, event):
         """Handle clicks on the tree"""
@@ -151,39 +2420,18 @@ class DeleteItemsDialog:
         if region == "cell":
             column = self.tree.identify_column(event.x)
             if column == "#1":  # Checkbox column
-                item = self.tree.identify_row(event.y)
-                if item:
-                    values = self.tree.item(item)['values']
-                    item_name = values[1]
-                    if values[0] == '☐':
-                        self.tree.item(item, values=('☑', item_name, values[2]))
-                        self.selected_items.add(item_name)
-                    else:
-                        self.tree.item(item, values=('☐', item_name, values[2]))
+                row = self.grid.row_at(event.y)
+                if row:
+                    item_name = row[0]
+                    if item_name in self.selected_items:
                         self.selected_items.discard(item_name)
+                    else:
+                        self.selected_items.add(item_name)
+                    self.grid.refresh()
                     
                     # Update delete button state
                     self.delete_button['state'] = 'normal' if self.selected_items else 'disabled'
     
-    def format_currency(self, copper):
-        """Convert copper to platinum/gold/silver/copper format"""
-        platinum = copper // 1000
-        gold = (copper % 1000) // 100
-        silver = (copper % 100) // 10
-        copper = copper % 10
-        
-        result = []
-        if platinum > 0:
-            result.append(f"{platinum}p")
-        if gold > 0:
-            result.append(f"{gold}g")
-        if silver > 0:
-            result.append(f"{silver}s")
-        if copper > 0 or not result:
-            result.append(f"{copper}c")
-        
-        return " ".join(result)
-    
     def confirm_delete(self):
         if not self.selected_items:
             return
@@ -193,18 +2441,22 @@ class DeleteItemsDialog:
         msg = f"Are you sure you want to delete the following items?\n\n{items_list}"
         
         if messagebox.askyesno("Confirm Deletion", msg):
-            # Remove items from the price list
+            # Remove items from the price list and the lookup index
             for item in self.selected_items:
                 del self.item_prices[item]
+                key = item.casefold()
+                if self.price_index.get(key) == item:
+                    del self.price_index[key]
             
-            # Update the tree
-            for item in self.tree.get_children():
-                item_name = self.tree.item(item)['values'][1]
-                if item_name in self.selected_items:
-                    self.tree.delete(item)
+            # Call the callback to save changes; this also updates the search index
+            self.on_delete(set(self.selected_items))
             
-            # Call the callback to save changes
-            self.on_delete()
+            # Update the tree, staying where the list was scrolled to
+            if isinstance(self.all_rows, list):
+                self.all_rows = [row for row in self.all_rows if row[0] not in self.selected_items]
+            offset = self.grid.offset
+            self.apply_filter()
+            self.grid.offset = offset
             
             # Show success message
             messagebox.showinfo("Success", "Selected items have been deleted.")
@@ -212,91 +2464,184 @@ class DeleteItemsDialog:
             # Reset selection
             self.selected_items.clear()
             self.delete_button['state'] = 'disabled'
+            self.grid.refresh()
+
+class ImportPricesDialog:
+    def __init__(self, parent, path, item_prices, price_index, on_import):
+        self.dialog = tk.Toplevel(parent)
+        self.dialog.title("Import Prices")
+        self.dialog.geometry("400x220")
+        self.dialog.transient(parent)
+        self.dialog.grab_set()
+        
+        self.path = path
+        self.item_prices = item_prices
+        self.price_index = price_index
+        self.on_import = on_import
+        
+        # Create main frame
+        main_frame = ttk.Frame(self.dialog, padding="10")
+        main_frame.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        
+        ttk.Label(main_frame, text=f"File: {os.path.basename(path)}").grid(row=0, column=0, columnspan=2, sticky=tk.W, pady=5)
+        
+        # Conflict policy for items already in the price list
+        ttk.Label(main_frame, text="Existing items:").grid(row=1, column=0, sticky=tk.NW, pady=5)
+        self.policy_var = tk.StringVar(value='keep')
+        policy_frame = ttk.Frame(main_frame)
+        policy_frame.grid(row=1, column=1, sticky=tk.W)
+        ttk.Radiobutton(policy_frame, text="Keep current price", variable=self.policy_var, value='keep').pack(anchor=tk.W)
+        ttk.Radiobutton(policy_frame, text="Overwrite with imported price", variable=self.policy_var, value='overwrite').pack(anchor=tk.W)
+        ttk.Radiobutton(policy_frame, text="Use the higher price", variable=self.policy_var, value='max').pack(anchor=tk.W)
+        
+        # Progress
+        self.progress = ttk.Progressbar(main_frame, mode='determinate', maximum=1.0, length=360)
+        self.progress.grid(row=2, column=0, columnspan=2, pady=10)
+        
+        # Buttons
+        button_frame = ttk.Frame(main_frame)
+        button_frame.grid(row=3, column=0, columnspan=2)
+        
+        self.import_button = ttk.Button(button_frame, text="Import", command=self.start_import)
+        self.import_button.pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="Close", command=self.dialog.destroy).pack(side=tk.LEFT, padx=5)
+    
+    def start_import(self):
+        self.import_button['state'] = 'disabled'
+        policy = self.policy_var.get()
+        
+        # The worker merges against copies so the live price list is only touched on the Tk thread
+        item_prices = self.item_prices.copy()
+        if isinstance(item_prices, CompactPriceTable):
+            price_index = item_prices.index
+            self.prices_version = self.item_prices.version
+        else:
+            price_index = dict(self.price_index)
+            self.prices_version = None
+        
+        def work(progress):
+            bad_rows = []
+            entries = iter_price_entries(self.path, progress, bad_rows)
+            changes, added, stats = plan_price_merge(item_prices, price_index, entries, policy)
+            return changes, added, stats, bad_rows, merge_off_thread(item_prices, changes)
+        
+        BackgroundTask(self.dialog, work, self.finish_import, self.import_failed,
+                       lambda fraction: self.progress.configure(value=fraction))
+    
+    def finish_import(self, result):
+        changes, added, stats, bad_rows, merged = result
+        
+        # Apply the merge and keep the lookup index in sync
+        apply_price_changes(self.item_prices, changes, merged, self.prices_version)
+        for item_name in added:
+            self.price_index[item_name.casefold()] = item_name
+        if changes:
+            self.on_import(set(changes))
+        
+        msg = (f"Added {stats['added']} item(s), updated {stats['updated']}, "
+               f"left {stats['unchanged']} unchanged.")
+        if bad_rows:
+            msg += f"\n\n{len(bad_rows)} row(s) could not be read and were skipped."
+        messagebox.showinfo("Success", msg)
+        self.dialog.destroy()
+    
+    def import_failed(self, error):
+        messagebox.showerror("Error", f"Failed to import prices: {str(error)}")
+        self.import_button['state'] = 'normal'
 
 class VendorCalculator:
     def __init__(self, root):
+        started = time.perf_counter()
         self.root = root
         self.root.title("EverQuest Vendor Calculator")
-        self.root.geometry("450x300")  # Reduced window size
+        # Reduced window size, with room for the status bar when profiling
+        self.root.geometry("450x360" if PROFILER.enabled else "450x340")
         self.root.resizable(False, False)  # Prevent window resizing
         
         # Server name mappings for file names
-        self.SERVER_NAME_MAPPINGS = {
-            "Agnarr": "agnarr",
-            "Antonius Bayle - Kane Bayle": "antonius",
-            "Aradune": "aradune",
-            "Bertoxxulous - Sarym": "bertox",
-            "Bristlebane - The Tribunal": "bristle",
-            "Cazic-Thule - Fennin Ro": "cazic",
-            "Drinal - Maelin Starpyre": "drinal",
-            "Erollisi Marr - The Nameless": "erollisi",
-            "Firiona Vie": "firiona",
-            "Luclin - Stromm": "luclin",
-            "Mangler": "mangler",
-            "Mischief": "mischief",
-            "Oakwynd": "oakwynd",
-            "Povar - Quellious": "povar",
-            "Ragefire": "ragefire",
-            "Rizlona": "rizlona",
-            "Teek": "teek",
-            "The Rathe - Prexus": "rathe",
-            "Tormax": "tormax",
-            "Tunare - The Seventh Hammer": "tunare",
-            "Vaniki": "vaniki",
-            "Vox": "vox",
-            "Xegony - Druzzil Ro": "xegony",
-            "Yelinak": "yelinak",
-            "Zek": "zek"
-        }
+        self.SERVER_NAME_MAPPINGS = SERVER_NAME_MAPPINGS
         
         # EverQuest servers list
-        self.EQ_SERVERS = list(self.SERVER_NAME_MAPPINGS.keys())
+        self.EQ_SERVERS = EQ_SERVERS
         
         # Default item prices dictionary (all values converted to copper)
-        self.DEFAULT_ITEM_PRICES = {
-            "Chunk of Meat": 13,  # 1s 3c
-            "Wolf Meat": 10,      # 1s
-            "Pristine Pyre Beetle Carapace": 95,  # 9s 5c
-            "Cracked Pyre Beetle Carapace": 24,   # 2s 4c
-            "Fire Beetle Eye": 27,               # 2s 7c
-            "Snake Scales": 10,                  # 1s
-            "Garter Snake Tongue": 6,             # 6c
-            "Ruined Wolf Pelt": 10,              # 1s
-            "Rusty Scimitar": 181,              # 1g 8s 1c
-            "Tiny Dagger": 10,                   # 1s
-            "Spell: Pendril's Animation": 19     # 1s 9c
-        }
+        self.DEFAULT_ITEM_PRICES = DEFAULT_ITEM_PRICES
         
         # Load or create config
-        self.config_file = "eq_calculator_config.json"
-        self.items_file = "eq_calculator_items.json"
+        self.config_file = CONFIG_FILE
+        self.items_file = ITEMS_FILE
+        self.items_db_file = ITEMS_DB_FILE
+        self.price_file = PriceFile(self.items_file)
+        self.server_price_file = PriceFile(SERVER_PRICES_FILE)
         self.load_config()
-        self.load_items()
+        self.saver = DebouncedSaver(self.root, self.prepare_save)
+        self.server_saver = DebouncedSaver(self.root, self.prepare_server_save)
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        
+        # The price list loads in the background so the window paints right
+        # away; buttons that need prices stay disabled until it's in
+        self.ITEM_PRICES = {}
+        self.price_index = {}
+        self.server_prices = ServerPriceLayers()
+        self.item_store = None
+        self.engine = None
+        self.history = None
+        
+        # Callbacks to run once the next price save is written, e.g. recording a feed sync
+        self.after_save = []
+        self.items_loaded = False
+        self.price_widgets = []
+        BackgroundTask(self.root, self.load_price_list, self.price_list_loaded,
+                       self.price_list_failed, interval=20)
+        
+        # Parsed inventory currently shown in the grid
+        self.current_inventory = None
+        
+        # Search index over the price list, built in the background on first use
+        self.search_index = None
+        self.search_index_task = None
+        self.search_index_changes = set()
+        self.near_matches_pending = False
+        
+        # Background watcher for the current inventory file, when enabled
+        self.watcher = None
+        
+        # Snapshot that watch mode reports changes against
+        self.history_baseline = None
+        
+        # Status bar text for the profiler, once the main UI exists
+        self.status_var = None
+        if PROFILER.enabled:
+            self.root.after(500, self.poll_profiler)
         
         # If no EQ path is set, show setup first
+        self.main_ui_shown = False
         if not self.eq_path:
             self.show_setup()
         else:
             self.setup_ui()
+        
+        if PROFILER.enabled:
+            self.root.after_idle(lambda: PROFILER.report(
+                f"First paint {(time.perf_counter() - started) * 1000:.1f} ms"))
+    
+    def open_disk_cache(self):
+        """Open the on-disk parsed inventory cache next to the config file, if possible"""
+        cache_file = os.path.join(os.path.dirname(os.path.abspath(self.config_file)), CACHE_FILE)
+        try:
+            return DiskInventoryCache(cache_file)
+        except sqlite3.Error as e:
+            print(f"Error opening inventory cache: {str(e)}")
+            return None
     
-    def format_currency(self, copper):
-        """Convert copper to platinum/gold/silver/copper format"""
-        platinum = copper // 1000
-        gold = (copper % 1000) // 100
-        silver = (copper % 100) // 10
-        copper = copper % 10
-        
-        result = []
-        if platinum > 0:
-            result.append(f"{platinum}p")
-        if gold > 0:
-            result.append(f"{gold}g")
-        if silver > 0:
-            result.append(f"{silver}s")
-        if copper > 0 or not result:  # Show copper if it's the only value
-            result.append(f"{copper}c")
-        
-        return " ".join(result)
+    def open_history(self):
+        """Open the valuation history next to the config file, if possible"""
+        history_file = os.path.join(os.path.dirname(os.path.abspath(self.config_file)), HISTORY_FILE)
+        try:
+            return SnapshotStore(history_file)
+        except sqlite3.Error as e:
+            print(f"Error opening valuation history: {str(e)}")
+            return None
     
     def load_config(self):
         try:
@@ -304,55 +2649,172 @@ class VendorCalculator:
                 with open(self.config_file, 'r') as f:
                     config = json.load(f)
                     self.eq_path = config.get('eq_path', '')
+                    self.price_store = config.get('price_store', 'json')
+                    self.price_table = config.get('price_table', 'dict')
+                    self.price_feed = config.get('price_feed', '')
+                    self.price_feed_interval = config.get('price_feed_interval', 60)
+                    self.price_feed_policy = config.get('price_feed_policy', 'overwrite')
             else:
                 self.eq_path = ''
+                self.price_store = 'json'
+                self.price_table = 'dict'
+                self.price_feed = ''
+                self.price_feed_interval = 60
+                self.price_feed_policy = 'overwrite'
         except Exception:
             self.eq_path = ''
+            self.price_store = 'json'
+            self.price_table = 'dict'
+            self.price_feed = ''
+            self.price_feed_interval = 60
+            self.price_feed_policy = 'overwrite'
     
     def save_config(self):
         config = {'eq_path': self.eq_path}
-        with open(self.config_file, 'w') as f:
-            json.dump(config, f)
+        if self.price_store != 'json':
+            config['price_store'] = self.price_store
+        if self.price_table != 'dict':
+            config['price_table'] = self.price_table
+        if self.price_feed:
+            config['price_feed'] = self.price_feed
+            config['price_feed_interval'] = self.price_feed_interval
+            config['price_feed_policy'] = self.price_feed_policy
+        atomic_write(self.config_file, json.dumps(config))
+    
+    def load_price_list(self, progress):
+        """Background half of startup: load the prices, index them and open the inventory cache"""
+        with PROFILER.operation("Load prices"):
+            item_prices = self.load_items()
+            if self.price_table == 'compact':
+                with PROFILER.phase('compact'):
+                    item_prices = CompactPriceTable(item_prices)
+            with PROFILER.phase('index'):
+                price_index = build_price_index(item_prices)
+                if isinstance(item_prices, dict):
+                    dropped = drop_case_duplicates(item_prices, price_index)
+                    if dropped:
+                        print(f"Ignoring {len(dropped)} item(s) that only differ by case from another: "
+                              f"{', '.join(dropped[:10])}")
+            PROFILER.count('items', len(item_prices))
+            return (item_prices, price_index, self.load_server_prices(),
+                    self.open_disk_cache(), self.open_history())
+    
+    def price_list_loaded(self, result):
+        """Install the loaded price list and enable the buttons that need it; runs on the Tk thread"""
+        self.ITEM_PRICES, self.price_index, self.server_prices, disk_cache, self.history = result
+        self.engine = ValuationEngine(self.ITEM_PRICES, self.price_index, InventoryCache(disk_cache),
+                                      self.server_prices)
+        self.items_loaded = True
+        for widget in self.price_widgets:
+            widget.state(['!disabled'])
+        if self.price_widgets:
+            self.result_var.set("")
+        if self.price_feed:
+            self.sync_price_feed()
+    
+    def price_list_failed(self, error):
+        """Fall back to the default prices so the calculator is still usable"""
+        messagebox.showerror("Error", f"Failed to load items: {str(error)}")
+        item_prices = self.DEFAULT_ITEM_PRICES.copy()
+        self.price_list_loaded((item_prices, build_price_index(item_prices), ServerPriceLayers(), None, None))
     
     def load_items(self):
-        """Load items from JSON file"""
+        """Return the items from the JSON file, or from the SQLite store when enabled.
+        
+        Runs on a worker thread at startup, so it only touches the files.
+        """
+        if self.price_store == 'sqlite':
+            try:
+                return self.load_items_sqlite()
+            except Exception as e:
+                print(f"Error loading items from {self.items_db_file}: {str(e)}")
+                self.item_store = None
+        
         try:
-            if os.path.exists(self.items_file):
-                with open(self.items_file, 'r') as f:
-                    saved_items = json.load(f)
-                    # If the file is empty or doesn't have default items, add them
-                    if not saved_items:
-                        saved_items = self.DEFAULT_ITEM_PRICES
-                        with open(self.items_file, 'w') as f:
-                            json.dump(saved_items, f, indent=4)
-                    self.ITEM_PRICES = saved_items
-            else:
-                # If file doesn't exist, create it with default items
-                self.ITEM_PRICES = self.DEFAULT_ITEM_PRICES.copy()
-                with open(self.items_file, 'w') as f:
-                    json.dump(self.ITEM_PRICES, f, indent=4)
+            saved_items = self.price_file.load()
         except Exception as e:
+            # Don't overwrite a file we couldn't read; just run with the defaults
             print(f"Error loading items: {str(e)}")
-            # If there's an error, use default items and try to save them
-            self.ITEM_PRICES = self.DEFAULT_ITEM_PRICES.copy()
-            try:
-                with open(self.items_file, 'w') as f:
-                    json.dump(self.ITEM_PRICES, f, indent=4)
-            except Exception as e:
-                print(f"Error saving default items: {str(e)}")
+            return self.DEFAULT_ITEM_PRICES.copy()
+        
+        if saved_items:
+            return saved_items
+        
+        # If the file is missing or empty, create it with default items
+        item_prices = self.DEFAULT_ITEM_PRICES.copy()
+        try:
+            self.price_file.save(item_prices)
+        except Exception as e:
+            print(f"Error saving default items: {str(e)}")
+        return item_prices
     
-    def save_items(self):
-        """Save items to JSON file"""
+    def load_server_prices(self):
+        """Return the per-server price overrides; a missing or unreadable file means none"""
         try:
-            with open(self.items_file, 'w') as f:
-                json.dump(self.ITEM_PRICES, f, indent=4)
+            return ServerPriceLayers(self.server_price_file.load())
         except Exception as e:
-            messagebox.showerror("Error", f"Failed to save items: {str(e)}")
+            print(f"Error loading server prices: {str(e)}")
+            return ServerPriceLayers()
+    
+    def load_items_sqlite(self):
+        """Return the items from the SQLite store, importing the JSON list the first time"""
+        self.item_store = SQLitePriceStore(self.items_db_file)
+        if self.item_store.is_empty():
+            # Through PriceFile, so a missing or corrupt JSON list is restored from its backup
+            saved_items = self.price_file.load()
+            if saved_items:
+                self.item_store.import_prices(saved_items)
+            if self.item_store.is_empty():
+                self.item_store.upsert_many(self.DEFAULT_ITEM_PRICES.items())
+        return self.item_store.load()
+    
+    def save_items(self, changed_items=None):
+        """Queue a save of the price list; bursts of edits are written once in the background"""
+        self.saver.schedule(changed_items)
+    
+    def prepare_save(self, changed_items):
+        """Snapshot the prices to save and return the write to run off the UI thread"""
+        write = self.prepare_price_write(changed_items)
+        after_save, self.after_save = self.after_save, []
+        if not after_save:
+            return write
+        
+        def write_then_notify():
+            write()
+            for callback in after_save:
+                callback()
+        return write_then_notify
+    
+    def prepare_price_write(self, changed_items):
+        if self.item_store is not None:
+            if changed_items is None:
+                snapshot = self.ITEM_PRICES.copy()
+                return lambda: self.item_store.replace_all(snapshot)
+            snapshot = {name: self.ITEM_PRICES[name] for name in changed_items if name in self.ITEM_PRICES}
+            return lambda: self.item_store.apply_changes(snapshot, changed_items)
+        
+        snapshot = self.ITEM_PRICES.copy()
+        return lambda: self.price_file.save(snapshot)
+    
+    def prepare_server_save(self, changed_items):
+        """Snapshot the server overrides; they are sparse, so the whole file is rewritten"""
+        snapshot = self.server_prices.to_dict()
+        return lambda: self.server_price_file.save(snapshot)
+    
+    def on_close(self):
+        """Finish pending saves before the window closes"""
+        self.stop_watch()
+        self.saver.flush()
+        self.server_saver.flush()
+        self.root.destroy()
     
     def show_setup(self):
         # Clear any existing widgets
         for widget in self.root.winfo_children():
             widget.destroy()
+        self.price_widgets = []
+        self.main_ui_shown = False
+        self.current_inventory = None
         
         # Setup frame
         setup_frame = ttk.Frame(self.root, padding="20")
@@ -390,19 +2852,171 @@ class VendorCalculator:
         self.setup_ui()
     
     def add_new_item(self):
-        AddItemDialog(self.root, self.ITEM_PRICES, self.refresh_items)
+        AddItemDialog(self.root, self.ITEM_PRICES, self.price_index, self.refresh_items,
+                      self.server_prices, self.refresh_server_prices)
     
-    def refresh_items(self):
+    def refresh_items(self, changed_items=None):
         # Save items to file
-        self.save_items()
-        # Recalculate totals with updated price list
-        if self.char_name.get() and self.server_var.get():
+        self.save_items(changed_items)
+        self.update_search_index(changed_items)
+        # Nothing to reprice while the setup screen is up
+        if self.main_ui_shown:
+            self.revalue(changed_items)
+    
+    def refresh_server_prices(self, changed_items):
+        """Save the server overrides and reprice the grid after one was set or cleared"""
+        self.server_saver.schedule(changed_items)
+        self.revalue(changed_items)
+    
+    def revalue(self, changed_items=None):
+        """Bring the grid up to date after prices changed"""
+        if not (self.char_name.get() and self.server_var.get()):
+            return
+        
+        # Only reprice the changed rows if the inventory on screen is still current
+        inventory = self.current_inventory
+        if (changed_items is not None and inventory is not None
+                and inventory['file'] == self.get_inventory_file()
+                and self.engine.inventory_cache.is_current(inventory['file'])):
+            self.update_item_prices(changed_items)
+        else:
+            # Recalculate totals with updated price list
             self.calculate_total()
     
     def show_delete_items(self):
-        DeleteItemsDialog(self.root, self.ITEM_PRICES, self.refresh_items)
+        self.build_search_index()
+        DeleteItemsDialog(self.root, self.ITEM_PRICES, self.price_index, self.refresh_items,
+                          lambda: self.search_index)
+    
+    def build_search_index(self):
+        """Start building the price list search index in the background, if needed"""
+        if self.search_index is not None or self.search_index_task is not None:
+            return
+        # Copying is cheap for both table types; the names are read from the copy on the worker
+        names = self.ITEM_PRICES.copy()
+        self.search_index_changes = set()
+        self.search_index_task = BackgroundTask(self.root, lambda progress: NameSearchIndex(names),
+                                                self.search_index_built)
+    
+    def search_index_built(self, search_index):
+        self.search_index_task = None
+        self.search_index = search_index
+        # Catch up on edits made while it was building; None means start over
+        self.update_search_index(self.search_index_changes)
+        if self.near_matches_pending:
+            if self.search_index is None:
+                self.build_search_index()
+            else:
+                self.near_matches_pending = False
+                self.show_near_matches()
+    
+    def update_search_index(self, changed_items):
+        """Keep the search index in step with edits to the price list"""
+        if self.search_index_task is not None:
+            if changed_items is None or self.search_index_changes is None:
+                self.search_index_changes = None
+            else:
+                self.search_index_changes.update(changed_items)
+            return
+        if self.search_index is None:
+            return
+        if changed_items is None:
+            # Rebuilt on next use
+            self.search_index = None
+            return
+        for item_name in changed_items:
+            if item_name in self.ITEM_PRICES:
+                self.search_index.add(item_name)
+            else:
+                self.search_index.remove(item_name)
+    
+    def sync_price_feed(self):
+        """Check the price feed in the background and apply what changed.
+        
+        Repeats every price_feed_interval minutes. The feed is recorded as
+        applied only after the changed prices have been saved.
+        """
+        state_file = os.path.join(os.path.dirname(os.path.abspath(self.config_file)), FEED_STATE_FILE)
+        feed = PriceFeed(self.price_feed, state_file)
+        
+        # A compact table is merged into a copy on the worker; a dict is only read there
+        item_prices, price_index, version = self.ITEM_PRICES, self.price_index, None
+        if isinstance(item_prices, CompactPriceTable):
+            version = item_prices.version
+            item_prices = item_prices.copy()
+            price_index = item_prices.index
+        
+        def work(progress):
+            with PROFILER.operation("Sync prices"):
+                result = feed.check(item_prices, price_index, self.price_feed_policy)
+                # Nothing to save, so the new validators can be recorded right away
+                if result is not None and not result[0]:
+                    feed.commit(result[3])
+                return result, merge_off_thread(item_prices, result[0] if result else None)
+        
+        BackgroundTask(self.root, work, lambda result: self.price_feed_checked(feed, *result, version),
+                       self.price_feed_failed)
+    
+    def price_feed_checked(self, feed, result, merged=None, version=None):
+        try:
+            if result is not None and result[0]:
+                changes, added, stats, state = result
+                apply_price_changes(self.ITEM_PRICES, changes, merged, version)
+                for item_name in added:
+                    self.price_index[item_name.casefold()] = item_name
+                self.after_save.append(lambda: feed.commit(state))
+                self.refresh_items(set(changes))
+                print(f"Price feed: added {stats['added']} item(s), updated {stats['updated']}")
+        finally:
+            # Keep syncing even if applying this update failed
+            self.schedule_price_feed()
+    
+    def price_feed_failed(self, error):
+        print(f"Error syncing price feed {self.price_feed}: {str(error)}")
+        self.schedule_price_feed()
+    
+    def schedule_price_feed(self):
+        if self.price_feed_interval and self.price_feed_interval > 0:
+            self.root.after(int(self.price_feed_interval * 60000), self.sync_price_feed)
+    
+    def show_near_matches(self):
+        """List unpriced inventory items with similarly named price list entries"""
+        if self.current_inventory is None:
+            messagebox.showerror("Error", "Calculate a total first!")
+            return
+        if self.search_index is None:
+            # Shown once the index has been built in the background
+            self.near_matches_pending = True
+            self.build_search_index()
+            return
+        
+        report = self.engine.near_matches(self.current_inventory, self.search_index)
+        if not report:
+            messagebox.showinfo("Near Matches", "No unpriced items look like items in the price list.")
+            return
+        lines = "\n".join(f"- {item_name} -> {', '.join(matches)}" for item_name, matches in report[:20])
+        messagebox.showinfo("Near Matches", f"These unpriced items look like items in your price list:\n\n{lines}")
+    
+    def import_items(self):
+        path = filedialog.askopenfilename(title="Import Prices",
+                                          filetypes=[("Price lists", "*.csv *.json"), ("All files", "*.*")])
+        if path:
+            ImportPricesDialog(self.root, path, self.ITEM_PRICES, self.price_index, self.refresh_items)
+    
+    def export_items(self):
+        path = filedialog.asksaveasfilename(title="Export Prices", defaultextension=".csv",
+                                            filetypes=[("CSV", "*.csv"), ("JSON", "*.json")])
+        if not path:
+            return
+        
+        snapshot = self.ITEM_PRICES.copy()
+        BackgroundTask(self.root, lambda progress: export_prices(snapshot, path, progress),
+                       lambda count: messagebox.showinfo("Success", f"Exported {count} item(s) to {path}"),
+                       lambda error: messagebox.showerror("Error", f"Failed to export prices: {str(error)}"))
     
     def setup_ui(self):
+        self.main_ui_shown = True
+        
         # Main frame
         main_frame = ttk.Frame(self.root, padding="5")
         main_frame.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
@@ -412,6 +3026,10 @@ class VendorCalculator:
         reset_frame.grid(row=0, column=1, sticky='ne', padx=2, pady=2)
         ttk.Button(reset_frame, text="Reset EQ Path", 
                   command=self.reset_eq_path).pack(side=tk.RIGHT)
+        export_button = ttk.Button(reset_frame, text="Export Prices", command=self.export_items)
+        export_button.pack(side=tk.RIGHT, padx=2)
+        import_button = ttk.Button(reset_frame, text="Import Prices", command=self.import_items)
+        import_button.pack(side=tk.RIGHT)
         
         # Character name input
         ttk.Label(main_frame, text="Character Name:").grid(row=1, column=0, sticky=tk.W, pady=2)
@@ -425,7 +3043,19 @@ class VendorCalculator:
         server_combo.grid(row=2, column=1, padx=2)
         
         # Calculate button
-        ttk.Button(main_frame, text="Calculate Total Value", command=self.calculate_total).grid(row=3, column=0, columnspan=2, pady=5)
+        calculate_button = ttk.Button(main_frame, text="Calculate Total Value", command=self.calculate_total)
+        calculate_button.grid(row=3, column=0, columnspan=2, pady=5)
+        
+        # Value bank, shared bank and worn items as well as General slots
+        self.all_slots_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(main_frame, text="All slots", variable=self.all_slots_var,
+                        command=self.change_locations).grid(row=3, column=0, sticky='w')
+        
+        # Auto-refresh when EQ rewrites the inventory file
+        self.watch_var = tk.BooleanVar(value=False)
+        watch_button = ttk.Checkbutton(main_frame, text="Watch", variable=self.watch_var,
+                                       command=self.toggle_watch)
+        watch_button.grid(row=3, column=1, sticky='e')
         
         # Results display
         self.result_var = tk.StringVar()
@@ -436,12 +3066,26 @@ class VendorCalculator:
         button_frame = ttk.Frame(main_frame)
         button_frame.grid(row=4, column=1, padx=2, sticky='e')
         
-        ttk.Button(button_frame, text="Add Item", command=self.add_new_item).pack(side=tk.LEFT, padx=2)
-        ttk.Button(button_frame, text="Delete Items", command=self.show_delete_items).pack(side=tk.LEFT, padx=2)
+        add_button = ttk.Button(button_frame, text="Add Item", command=self.add_new_item)
+        add_button.pack(side=tk.LEFT, padx=2)
+        delete_button = ttk.Button(button_frame, text="Delete Items", command=self.show_delete_items)
+        delete_button.pack(side=tk.LEFT, padx=2)
+        near_matches_button = ttk.Button(button_frame, text="Near Matches", command=self.show_near_matches)
+        near_matches_button.pack(side=tk.LEFT, padx=2)
         
-        # Create Treeview for itemized breakdown
+        # Everything that needs the price list waits for it to finish loading
+        self.price_widgets = [import_button, export_button, calculate_button, watch_button,
+                              add_button, delete_button, near_matches_button]
+        if not self.items_loaded:
+            for widget in self.price_widgets:
+                widget.state(['disabled'])
+            self.result_var.set("Loading prices...")
+        
+        # Create Treeview for itemized breakdown; rows are (item name,
+        # quantity, price, total, {slot class: count}) with prices in copper
         columns = ('Item Name', 'Quantity', 'Price', 'Total')
-        self.tree = ttk.Treeview(main_frame, columns=columns, show='headings', height=5)  # Reduced height
+        self.grid = VirtualGrid(main_frame, columns, 5, self.format_rows)  # Reduced height
+        self.tree = self.grid.tree
         
         # Define headings and bind click events
         self.sort_column = None
@@ -454,36 +3098,46 @@ class VendorCalculator:
             else:
                 self.tree.column(col, width=80)
         
-        # Add scrollbar
-        scrollbar = ttk.Scrollbar(main_frame, orient=tk.VERTICAL, command=self.tree.yview)
-        self.tree.configure(yscrollcommand=scrollbar.set)
-        
         # Grid the tree and scrollbar
         self.tree.grid(row=5, column=0, columnspan=2, pady=5, sticky='nsew')
-        scrollbar.grid(row=5, column=2, sticky='ns')
+        self.grid.scrollbar.grid(row=5, column=2, sticky='ns')
+        
+        # Per slot class subtotals
+        self.subtotal_var = tk.StringVar()
+        ttk.Label(main_frame, textvariable=self.subtotal_var).grid(row=6, column=0, columnspan=2, sticky=tk.W)
+        
+        # What changed since the last valuation, or since watching started
+        self.delta_var = tk.StringVar()
+        ttk.Label(main_frame, textvariable=self.delta_var).grid(row=7, column=0, columnspan=2, sticky=tk.W)
+        
+        # Timings of the last operation, only when profiling is turned on
+        if PROFILER.enabled:
+            self.status_var = tk.StringVar(value="Profiling enabled")
+            ttk.Label(main_frame, textvariable=self.status_var, font=('Arial', 8),
+                      wraplength=430).grid(row=8, column=0, columnspan=3, sticky=tk.W)
         
         # Configure grid weights
         main_frame.columnconfigure(1, weight=1)
         main_frame.rowconfigure(5, weight=1)
     
+    def format_rows(self, rows):
+        """Display values for a list of (item name, quantity, price, total, ...) rows"""
+        prices = format_currency_column([row[2] for row in rows])
+        totals = format_currency_column([row[3] for row in rows])
+        return [(row[0], row[1], price, total) for row, price, total in zip(rows, prices, totals)]
+    
     def sort_treeview(self, col):
         """Sort tree contents when a column header is clicked"""
-        # Get all items from the tree
-        items = [(self.tree.set(item, col), item) for item in self.tree.get_children('')]
-        
         # Determine if we need to reverse the sort
         if self.sort_column == col:
             self.sort_reverse = not self.sort_reverse
+            # Rows are already sorted on this column, so flipping them is enough
+            self.grid.rows.reverse()
         else:
             self.sort_column = col
             self.sort_reverse = False
-        
-        # Sort the items
-        items.sort(reverse=self.sort_reverse)
-        
-        # Rearrange items in sorted positions
-        for index, (_, item) in enumerate(items):
-            self.tree.move(item, '', index)
+            self.apply_sort()
+        self.grid.refresh()
         
         # Update column header to show sort direction
         for column in self.tree['columns']:
@@ -493,77 +3147,618 @@ class VendorCalculator:
             else:
                 self.tree.heading(column, text=column)
     
+    def apply_sort(self):
+        """Sort the grid rows on the current sort column using their typed values"""
+        if self.sort_column is not None:
+            self.grid.rows.sort(key=RESULT_SORT_KEYS[self.sort_column], reverse=self.sort_reverse)
+    
+    def get_inventory_file(self):
+        """Path of the inventory file for the entered character and server"""
+        # Get the shortened server name from the mapping
+        server_name = self.SERVER_NAME_MAPPINGS[self.server_var.get()]
+        
+        # Construct the inventory file path with correct format: CharacterName_Server-Inventory.txt
+        return os.path.join(self.eq_path, f"{self.char_name.get()}_{server_name}-Inventory.txt")
+    
     def calculate_total(self):
         if not self.char_name.get() or not self.server_var.get():
             messagebox.showerror("Error", "Please enter your character name and select a server!")
             return
         
-        # Get the shortened server name from the mapping
-        server_name = self.SERVER_NAME_MAPPINGS[self.server_var.get()]
-        
-        # Construct the inventory file path with correct format: CharacterName_Server-Inventory.txt
-        inventory_file = os.path.join(self.eq_path, f"{self.char_name.get()}_{server_name}-Inventory.txt")
+        inventory_file = self.get_inventory_file()
         
         if not os.path.exists(inventory_file):
             messagebox.showerror("Error", f"Inventory file not found: {inventory_file}")
             return
         
         try:
-            total_copper = 0
-            # Clear existing items in the tree
-            for item in self.tree.get_children():
-                self.tree.delete(item)
-            
-            with open(inventory_file, 'r') as file:
-                # Try to detect delimiter
-                first_line = file.readline().strip()
-                delimiter = ',' if ',' in first_line else '\t'
-                file.seek(0)
-                
-                reader = csv.reader(file, delimiter=delimiter)
-                for row in reader:
-                    if len(row) >= 5 and row[0].startswith("General"):
-                        item_name = row[1]
-                        count = int(row[3])
-                        
-                        # Case-insensitive item lookup
-                        item_found = False
-                        for stored_item, price in self.ITEM_PRICES.items():
-                            if item_name.lower() == stored_item.lower():
-                                item_price = price
-                                item_total = item_price * count
-                                total_copper += item_total
-                                
-                                # Add item to tree
-                                self.tree.insert('', 'end', values=(
-                                    item_name,
-                                    count,
-                                    self.format_currency(item_price),
-                                    self.format_currency(item_total)
-                                ))
-                                item_found = True
-                                break
+            previous = self.current_inventory
+            with PROFILER.operation("Calculate"):
+                inventory = self.engine.load_inventory(inventory_file)
+                self.show_inventory(inventory)
+                if inventory is not previous:
+                    self.record_snapshot(inventory)
             
-            # Update total value display
-            result = self.format_currency(total_copper)
-            self.result_var.set(result)
+            # Report rows that were skipped instead of failing the whole file
+            if inventory['bad_rows'] and inventory is not previous:
+                skipped = "\n".join(f"Line {line_number}: {reason}"
+                                     for line_number, _, reason in inventory['bad_rows'][:10])
+                messagebox.showwarning("Warning", f"{len(inventory['bad_rows'])} row(s) could not be read and were skipped:\n\n{skipped}")
             
         except Exception as e:
             messagebox.showerror("Error", f"An error occurred: {str(e)}")
     
+    def get_locations(self):
+        """Slot classes to value, from the All slots checkbox"""
+        return LOCATION_CLASSES if self.all_slots_var.get() else DEFAULT_LOCATIONS
+    
+    def change_locations(self):
+        """Revalue the inventory on screen for the new slot classes without re-reading it"""
+        if self.current_inventory is not None:
+            with PROFILER.operation("Revalue"):
+                self.show_inventory(self.current_inventory)
+    
+    def show_inventory(self, inventory):
+        """Fill the grid and totals from a parsed inventory, one row per item"""
+        self.current_inventory = inventory
+        locations = self.get_locations()
+        
+        rows = []
+        self.total_copper = 0
+        self.location_totals = {}
+        with PROFILER.phase('price'):
+            for entry in inventory['items'].values():
+                row = self.engine.item_row(entry, locations, inventory['server'])
+                if row is not None:
+                    rows.append(row)
+                    self.add_row_totals(row, 1)
+        PROFILER.count('grid rows', len(rows))
+        
+        with PROFILER.phase('grid'):
+            self.grid.set_rows(rows)
+            self.apply_sort()
+            if PROFILER.enabled:
+                # Draw now instead of at idle so the Treeview updates are timed too
+                self.tree.update_idletasks()
+        
+        # Update total value display
+        self.show_totals()
+    
+    def record_snapshot(self, inventory):
+        """Add a valuation to the history and show what changed since the previous one.
+        
+        While watching, changes are reported since watching started instead.
+        """
+        character, server = inventory['character'], inventory['server']
+        if self.history is None or character is None:
+            return
+        try:
+            previous_id = self.history.latest_id(character, server)
+            with PROFILER.phase('history'):
+                self.history.append(character, server, self.engine.snapshot_items(inventory))
+            baseline = self.history_baseline if self.watcher is not None else previous_id
+            report = self.history.diff(character, server, baseline) if baseline is not None else None
+        except (sqlite3.Error, ValueError) as e:
+            print(f"Error saving valuation history: {str(e)}")
+            return
+        self.show_delta(report)
+    
+    def show_delta(self, report):
+        """Summarize a history diff under the grid.
+        
+        History always covers every slot, so when the grid only shows some
+        of them the line says so rather than contradict the total above it.
+        """
+        if report is None:
+            self.delta_var.set("")
+            return
+        since = time.strftime("%H:%M", time.localtime(report['since']))
+        scope = "" if self.get_locations() == LOCATION_CLASSES else " (all slots)"
+        if not (report['gained'] or report['lost'] or report['value_change']):
+            self.delta_var.set(f"No change in any slot since {since}" if scope else f"No change since {since}")
+            return
+        
+        sign = "-" if report['value_change'] < 0 else "+"
+        text = f"Since {since}{scope}: {sign}{format_currency(abs(report['value_change']))}"
+        # A rate over less than a minute is mostly noise
+        if report['per_hour'] is not None and report['until'] - report['since'] >= 60:
+            text += f" ({sign}{format_currency(abs(report['per_hour']))}/hr)"
+        self.delta_var.set(f"{text}, {len(report['gained'])} gained, {len(report['lost'])} lost")
+    
+    def add_row_totals(self, row, sign):
+        """Add (sign=1) or remove (sign=-1) a grid row's value from the running totals"""
+        item_price, item_total, counts = row[2], row[3], row[4]
+        self.total_copper += sign * item_total
+        for location, count in counts.items():
+            self.location_totals[location] = self.location_totals.get(location, 0) + sign * item_price * count
+    
+    def show_totals(self):
+        self.result_var.set(format_currency(self.total_copper))
+        subtotals = [f"{location}: {format_currency(self.location_totals[location])}"
+                     for location in LOCATION_CLASSES if self.location_totals.get(location)]
+        self.subtotal_var.set("   ".join(subtotals) if len(subtotals) > 1 else "")
+    
+    def update_item_prices(self, changed_items):
+        """Reprice only the grid rows for items whose price was added, changed or deleted"""
+        with PROFILER.operation("Reprice"):
+            self.reprice_rows(changed_items)
+    
+    def reprice_rows(self, changed_items):
+        keys = {item_name.casefold() for item_name in changed_items}
+        
+        # Drop the old rows and their share of the totals
+        kept = []
+        for row in self.grid.rows:
+            if row[0].casefold() in keys:
+                self.add_row_totals(row, -1)
+            else:
+                kept.append(row)
+        
+        # Add rows back for items that still have a price
+        locations = self.get_locations()
+        server = self.current_inventory['server']
+        for key in keys:
+            entry = self.current_inventory['items'].get(key)
+            row = self.engine.item_row(entry, locations, server) if entry is not None else None
+            if row is not None:
+                kept.append(row)
+                self.add_row_totals(row, 1)
+        
+        self.grid.rows = kept
+        self.apply_sort()
+        self.grid.refresh()
+        self.show_totals()
+    
+    def toggle_watch(self):
+        """Start or stop watching the current character's inventory file"""
+        if not self.watch_var.get():
+            self.stop_watch()
+            return
+        
+        # Show the current inventory first so the watcher only reacts to new writes
+        self.calculate_total()
+        inventory = self.current_inventory
+        if inventory is None or inventory['file'] != self.get_inventory_file():
+            self.watch_var.set(False)
+            return
+        
+        self.stop_watch()
+        if self.history is not None and inventory['character'] is not None:
+            self.history_baseline = self.history.latest_id(inventory['character'], inventory['server'])
+        self.watcher = InventoryWatcher(inventory['file'],
+                                        self.engine.inventory_cache.cached_key(inventory['file']))
+        self.watcher.start()
+        watcher = self.watcher
+        self.root.after(250, lambda: self.poll_watcher(watcher))
+    
+    def stop_watch(self):
+        if self.watcher is not None:
+            self.watcher.stop()
+            self.watcher = None
+        self.history_baseline = None
+    
+    def poll_watcher(self, watcher):
+        """Show inventories parsed by the watcher thread; runs on the Tk main loop
+        
+        Each watcher has its own polling loop, which ends once the watcher
+        has been stopped or replaced.
+        """
+        if watcher is not self.watcher:
+            return
+        
+        try:
+            latest = None
+            while True:
+                try:
+                    latest = watcher.results.get_nowait()
+                except queue.Empty:
+                    break
+            
+            if latest is not None:
+                inventory_file, key, inventory = latest
+                # Hand the parse to the cache so the next calculation doesn't read the file again
+                self.engine.inventory_cache.store(inventory_file, key, inventory)
+                current = self.current_inventory
+                if current is not None and current['file'] == inventory_file:
+                    with PROFILER.operation("Watch refresh"):
+                        self.show_inventory(inventory)
+                        self.record_snapshot(inventory)
+        finally:
+            # Keep polling even if showing this update failed
+            self.root.after(250, lambda: self.poll_watcher(watcher))
+    
+    def poll_profiler(self):
+        """Show the last profiled operation in the status bar"""
+        if self.status_var is not None:
+            self.status_var.set(PROFILER.last_summary or "Profiling enabled")
+        self.root.after(500, self.poll_profiler)
+    
     def reset_eq_path(self):
         """Reset the EQ installation path and show setup screen"""
         if messagebox.askyesno("Reset EQ Path", 
                              "Are you sure you want to reset the EverQuest installation path?\n"
                              "You will need to select it again."):
             self.eq_path = ''
+            self.stop_watch()
             self.save_config()
             # Clear main UI and show setup
             for widget in self.root.winfo_children():
                 widget.destroy()
             self.show_setup()
 
+def load_price_table(items_file):
+    """Load a saved price list (JSON or SQLite .db) for headless use, falling back to the defaults.
+    
+    JSON lists are read through PriceFile, so a missing or corrupt file is
+    rolled back to its backup like in the GUI; the defaults are only used
+    when there is neither.
+    """
+    if items_file.endswith('.db'):
+        if not os.path.exists(items_file):
+            print(f"Price list not found: {items_file}, using default prices", file=sys.stderr)
+            return dict(DEFAULT_ITEM_PRICES)
+        store = SQLitePriceStore(items_file)
+        try:
+            return store.load() or dict(DEFAULT_ITEM_PRICES)
+        finally:
+            store.close()
+    prices = PriceFile(items_file).load()
+    if prices is None:
+        print(f"No usable price list at {items_file}, using default prices", file=sys.stderr)
+        return dict(DEFAULT_ITEM_PRICES)
+    prices = prices or dict(DEFAULT_ITEM_PRICES)
+    dropped = drop_case_duplicates(prices, build_price_index(prices))
+    if dropped:
+        print(f"Ignoring {len(dropped)} item(s) that only differ by case from another: "
+              f"{', '.join(dropped[:10])}", file=sys.stderr)
+    return prices
+
+def write_results(results, output, output_format):
+    """Write valuation results as JSON or CSV"""
+    if output_format == 'json':
+        json.dump({
+            'inventories': results,
+            'grand_total': sum(result['total'] for result in results)
+        }, output, indent=4)
+        output.write("\n")
+        return
+    
+    writer = csv.writer(output, lineterminator="\n")
+    writer.writerow(['file', 'character', 'server', 'item_name', 'quantity', 'unit_price', 'total'])
+    for result in results:
+        prefix = [result['file'], result['character'] or '', result['server'] or '']
+        for item in result['items']:
+            writer.writerow(prefix + [item['name'], item['quantity'], item['unit_price'], item['total']])
+        if len(result['location_totals']) > 1:
+            for location in LOCATION_CLASSES:
+                if location in result['location_totals']:
+                    writer.writerow(prefix + [f"TOTAL {location}", '', '', result['location_totals'][location]])
+        writer.writerow(prefix + ['TOTAL', '', '', result['total']])
+
+def write_sweep(summary, output, output_format):
+    """Write sweep totals as JSON or CSV"""
+    if output_format == 'json':
+        json.dump(summary, output, indent=4)
+        output.write("\n")
+        return
+    
+    writer = csv.writer(output, lineterminator="\n")
+    writer.writerow(['character', 'server', 'file', 'total'])
+    for character in summary['characters']:
+        writer.writerow([character['character'], character['server'], character['file'], character['total']])
+    for server, total in summary['servers'].items():
+        writer.writerow(['TOTAL', server, '', total])
+    writer.writerow(['TOTAL', 'ALL', '', summary['grand_total']])
+
+def load_server_prices(path):
+    """Load per-server price overrides for headless use, or None if there are none"""
+    if not path or not os.path.exists(path):
+        return None
+    overrides = PriceFile(path).load()
+    return ServerPriceLayers(overrides) if overrides else None
+
+def load_eq_path():
+    """Read the EQ installation path saved by the GUI, if any"""
+    try:
+        with open(CONFIG_FILE, 'r') as f:
+            return json.load(f).get('eq_path', '')
+    except (OSError, ValueError):
+        return ''
+
+def load_items_file():
+    """Return the price list the GUI uses: the SQLite store if the config enables it, else the JSON file.
+    
+    Until the GUI has created the store it still reads the JSON file, and
+    so does the command line, so edits made either way aren't lost.
+    """
+    try:
+        with open(CONFIG_FILE, 'r') as f:
+            price_store = json.load(f).get('price_store', 'json')
+    except (OSError, ValueError, AttributeError):
+        return ITEMS_FILE
+    if price_store == 'sqlite' and os.path.exists(ITEMS_DB_FILE):
+        return ITEMS_DB_FILE
+    return ITEMS_FILE
+
+def run_value(args, item_prices):
+    """Value the inventory files named on the command line"""
+    disk_cache = DiskInventoryCache(args.cache) if args.cache else None
+    # Keep parses in memory when the inventory is used again after valuing it
+    if disk_cache is not None or args.near_matches or args.history:
+        inventory_cache = InventoryCache(disk_cache)
+    else:
+        inventory_cache = None
+    engine = ValuationEngine(item_prices, inventory_cache=inventory_cache,
+                             server_prices=load_server_prices(args.server_prices))
+    locations = LOCATION_CLASSES if args.all_slots else DEFAULT_LOCATIONS
+    search_index = NameSearchIndex(item_prices) if args.near_matches else None
+    history = SnapshotStore(args.history) if args.history else None
+    results = []
+    failed = False
+    for inventory_file in args.inventory_files:
+        try:
+            with PROFILER.operation(f"Value {inventory_file}"):
+                result = engine.value_inventory(inventory_file, locations)
+        except (OSError, ValueError, csv.Error) as e:
+            print(f"Error valuing {inventory_file}: {e}", file=sys.stderr)
+            failed = True
+            continue
+        
+        for line_number, _, reason in result['bad_rows']:
+            print(f"{inventory_file}:{line_number}: skipped row, {reason}", file=sys.stderr)
+        if search_index is not None:
+            inventory = engine.load_inventory(inventory_file)
+            result['near_matches'] = dict(engine.near_matches(inventory, search_index))
+        if history is not None and result['character'] is not None:
+            inventory = engine.load_inventory(inventory_file)
+            history.append(result['character'], result['server'], engine.snapshot_items(inventory))
+        results.append(result)
+    
+    if args.output:
+        with open(args.output, 'w', newline='') as output:
+            write_results(results, output, args.format)
+    else:
+        write_results(results, sys.stdout, args.format)
+    
+    return 1 if failed else 0
+
+def run_sweep(args, item_prices):
+    """Value every character's inventory file under the EQ folder"""
+    eq_path = args.eq_path or load_eq_path()
+    if not eq_path or not os.path.isdir(eq_path):
+        print("EverQuest folder not found, pass --eq-path", file=sys.stderr)
+        return 2
+    
+    servers = [SERVER_NAME_MAPPINGS.get(server, server) for server in args.server] if args.server else None
+    inventory_files = find_inventory_files(eq_path, servers, args.recursive)
+    locations = LOCATION_CLASSES if args.all_slots else DEFAULT_LOCATIONS
+    server_prices = load_server_prices(args.server_prices)
+    with PROFILER.operation("Sweep"):
+        PROFILER.count('files', len(inventory_files))
+        summary = sweep_inventories(inventory_files, item_prices, args.workers, locations, args.cache,
+                                    server_prices.to_dict() if server_prices else None)
+    for error in summary['errors']:
+        print(f"Error valuing {error}", file=sys.stderr)
+    
+    if args.output:
+        with open(args.output, 'w', newline='') as output:
+            write_sweep(summary, output, args.format)
+    else:
+        write_sweep(summary, sys.stdout, args.format)
+    
+    return 1 if summary['errors'] else 0
+
+def run_history(args, item_prices):
+    """Report a character's valuation history and what changed over it"""
+    if not os.path.exists(args.history):
+        print(f"History not found: {args.history}", file=sys.stderr)
+        return 2
+    server = SERVER_NAME_MAPPINGS.get(args.server, args.server)
+    history = SnapshotStore(args.history)
+    try:
+        since = time.time() - args.hours * 3600 if args.hours is not None else None
+        snapshots = history.snapshots(args.character, server, since)
+        report = None
+        if len(snapshots) > 1:
+            # Over the whole window, or since the snapshot before the latest
+            since_id = snapshots[0][0] if args.hours is not None else snapshots[-2][0]
+            report = history.diff(args.character, server, since_id, snapshots[-1][0])
+    finally:
+        history.close()
+    
+    json.dump({
+        'character': args.character,
+        'server': server,
+        'snapshots': [{'id': snapshot_id, 'time': taken_at, 'total': total}
+                      for snapshot_id, taken_at, total in snapshots],
+        'diff': report
+    }, sys.stdout, indent=4)
+    sys.stdout.write("\n")
+    return 0
+
+def save_price_table(items_file, item_prices, changed_items=None):
+    """Persist a price list edited from the command line; changed_items=None saves everything"""
+    if items_file.endswith('.db'):
+        store = SQLitePriceStore(items_file)
+        try:
+            if changed_items is None:
+                store.replace_all(item_prices)
+            else:
+                store.apply_changes(item_prices, changed_items)
+        finally:
+            store.close()
+    else:
+        PriceFile(items_file).save(item_prices)
+
+def run_import(args, item_prices):
+    """Merge a CSV or JSON price dump into the saved price list, or into one server's overrides"""
+    server_prices = None
+    if args.server:
+        server_prices = load_server_prices(args.server_prices) or ServerPriceLayers()
+        item_prices = server_prices.prices(args.server)
+    
+    bad_rows = []
+    try:
+        entries = iter_price_entries(args.source, bad_rows=bad_rows)
+        changes, _, stats = plan_price_merge(item_prices, build_price_index(item_prices), entries, args.policy)
+    except (OSError, ValueError, csv.Error) as e:
+        print(f"Error importing {args.source}: {e}", file=sys.stderr)
+        return 2
+    
+    for row, reason in bad_rows:
+        print(f"{args.source}:{row}: skipped, {reason}", file=sys.stderr)
+    if changes and server_prices is not None:
+        for item_name, price in changes.items():
+            server_prices.set_price(args.server, item_name, price)
+        PriceFile(args.server_prices).save(server_prices.to_dict())
+    elif changes:
+        # A new price list starts from the defaults, so save all of it
+        full_save = not os.path.exists(args.items)
+        item_prices.update(changes)
+        save_price_table(args.items, item_prices, None if full_save else changes)
+    print(f"Added {stats['added']}, updated {stats['updated']}, unchanged {stats['unchanged']}")
+    return 0
+
+def run_sync(args, item_prices):
+    """Apply what changed in a price feed (URL, file or folder) to the saved price list"""
+    feed = PriceFeed(args.feed, args.state)
+    bad_rows = []
+    try:
+        result = feed.check(item_prices, build_price_index(item_prices), args.policy, bad_rows)
+    except (OSError, ValueError, csv.Error) as e:
+        print(f"Error syncing {args.feed}: {e}", file=sys.stderr)
+        return 2
+    
+    for row, reason in bad_rows:
+        print(f"{args.feed}:{row}: skipped, {reason}", file=sys.stderr)
+    if result is None:
+        print("Price feed unchanged")
+        return 0
+    
+    changes, _, stats, state = result
+    if changes:
+        full_save = not os.path.exists(args.items)
+        item_prices.update(changes)
+        save_price_table(args.items, item_prices, None if full_save else changes)
+    feed.commit(state)
+    print(f"Added {stats['added']}, updated {stats['updated']}, unchanged {stats['unchanged']}")
+    return 0
+
+def run_export(args, item_prices):
+    """Write the saved price list, or one server's overrides, to CSV or JSON"""
+    if args.server:
+        server_prices = load_server_prices(args.server_prices)
+        item_prices = server_prices.prices(args.server) if server_prices else {}
+    count = export_prices(item_prices, args.destination)
+    print(f"Exported {count} item(s) to {args.destination}")
+    return 0
+
+def run_cli(argv):
+    """Command-line entry point for headless valuation"""
+    parser = argparse.ArgumentParser(
+        prog="main.py",
+        description="Value EverQuest inventory files without starting the GUI."
+    )
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    
+    # Options shared by the subcommands
+    items_option = argparse.ArgumentParser(add_help=False)
+    items_option.add_argument('--items', default=load_items_file(),
+                              help=f"price list JSON or SQLite .db file (default: {ITEMS_DB_FILE} if the "
+                                   f"calculator is set to use SQLite, else {ITEMS_FILE})")
+    
+    server_prices_option = argparse.ArgumentParser(add_help=False)
+    server_prices_option.add_argument('--server-prices', default=SERVER_PRICES_FILE, metavar='PATH',
+                                      help=f"per-server price overrides (default: {SERVER_PRICES_FILE})")
+    
+    server_option = argparse.ArgumentParser(add_help=False, parents=[server_prices_option])
+    server_option.add_argument('--server',
+                               help="work on this server's price overrides instead of the shared list")
+    
+    common = argparse.ArgumentParser(add_help=False, parents=[items_option, server_prices_option])
+    common.add_argument('--format', choices=('json', 'csv'), default='json',
+                        help="output format (default: json)")
+    common.add_argument('--output', '-o',
+                        help="write results to this file instead of stdout")
+    common.add_argument('--all-slots', action='store_true',
+                        help="value bank, shared bank and worn items too, not just General slots")
+    common.add_argument('--cache', nargs='?', const=CACHE_FILE, metavar='PATH',
+                        help=f"reuse parses of unchanged files from an on-disk cache (default: {CACHE_FILE})")
+    
+    value_parser = subparsers.add_parser('value', parents=[common],
+                                         help="value one or more inventory files")
+    value_parser.add_argument('inventory_files', nargs='+', metavar='FILE',
+                              help="Name_server-Inventory.txt files written by /outputfile inventory")
+    value_parser.add_argument('--near-matches', action='store_true',
+                              help="report price list names similar to unpriced items (JSON output)")
+    value_parser.add_argument('--history', nargs='?', const=HISTORY_FILE, metavar='PATH',
+                              help=f"record a snapshot of each inventory in the valuation history (default: {HISTORY_FILE})")
+    value_parser.set_defaults(handler=run_value)
+    
+    sweep_parser = subparsers.add_parser('sweep', parents=[common],
+                                         help="value every character's inventory in the EQ folder")
+    sweep_parser.add_argument('--eq-path',
+                              help="EverQuest folder (default: the path saved by the GUI)")
+    sweep_parser.add_argument('--server', action='append',
+                              help="only include this server, full or short name (repeatable)")
+    sweep_parser.add_argument('--workers', type=int,
+                              help="worker processes (default: one per CPU)")
+    sweep_parser.add_argument('--recursive', action='store_true',
+                              help="also search subfolders")
+    sweep_parser.set_defaults(handler=run_sweep)
+    
+    import_parser = subparsers.add_parser('import', parents=[items_option, server_option],
+                                          help="merge a CSV or JSON price dump into the price list")
+    import_parser.add_argument('source', help="CSV (name,price) or JSON price file")
+    import_parser.add_argument('--policy', choices=MERGE_POLICIES, default='keep',
+                               help="what to do with items already in the list (default: keep)")
+    import_parser.set_defaults(handler=run_import)
+    
+    export_parser = subparsers.add_parser('export', parents=[items_option, server_option],
+                                          help="write the price list to CSV or JSON")
+    export_parser.add_argument('destination', help="output file; .json for JSON, anything else for CSV")
+    export_parser.set_defaults(handler=run_export)
+    
+    sync_parser = subparsers.add_parser('sync', parents=[items_option],
+                                        help="apply changes from a price feed URL, file or folder")
+    sync_parser.add_argument('feed', help="http(s) URL, file:// URL, or path to a CSV/JSON file or a folder of them")
+    sync_parser.add_argument('--policy', choices=MERGE_POLICIES, default='overwrite',
+                             help="what to do with items already in the list (default: overwrite)")
+    sync_parser.add_argument('--state', default=FEED_STATE_FILE, metavar='PATH',
+                             help=f"where to remember what was last applied (default: {FEED_STATE_FILE})")
+    sync_parser.set_defaults(handler=run_sync)
+    
+    history_parser = subparsers.add_parser('history',
+                                           help="show a character's valuation history and what changed")
+    history_parser.add_argument('character', help="character name")
+    history_parser.add_argument('server', help="server, full or short name")
+    history_parser.add_argument('--history', default=HISTORY_FILE, metavar='PATH',
+                                help=f"valuation history database (default: {HISTORY_FILE})")
+    history_parser.add_argument('--hours', type=float,
+                                help="only the last N hours (default: all, diffing the last two snapshots)")
+    history_parser.set_defaults(handler=run_history, items=None)
+    
+    args = parser.parse_args(argv)
+    if args.items is None:
+        return args.handler(args, None)
+    
+    try:
+        item_prices = load_price_table(args.items)
+    except (OSError, ValueError) as e:
+        print(f"Error loading price list: {e}", file=sys.stderr)
+        return 2
+    
+    return args.handler(args, item_prices)
+
 if __name__ == "__main__":
+    # Needed for the process pool in the frozen Windows build
+    multiprocessing.freeze_support()
+    if len(sys.argv) > 1:
+        sys.exit(run_cli(sys.argv[1:]))
+    if tk is None:
+        sys.exit("The calculator window needs Tkinter (e.g. the python3-tk package); "
+                 "run `python main.py --help` for the command line")
+    
     root = tk.Tk()
     app = VendorCalculator(root)
     root.mainloop() 
\ No newline at end of file
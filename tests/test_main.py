@@ -0,0 +1,166 @@
+import random
+
+import pytest
+
+import main
+
+
+class CaseInsensitiveModel:
+    """Reference price table: a dict keyed by casefolded name that keeps the first spelling"""
+
+    def __init__(self, items=()):
+        # Like a loaded price list, later names that only differ by case are dropped
+        self.entries = {}
+        for name, price in items:
+            self.entries.setdefault(name.casefold(), (name, price))
+
+    def __setitem__(self, name, price):
+        entry = self.entries.get(name.casefold())
+        self.entries[name.casefold()] = (entry[0] if entry else name, price)
+
+    def __delitem__(self, name):
+        del self.entries[name.casefold()]
+
+    def as_dict(self):
+        return dict(self.entries.values())
+
+
+def random_name(rng):
+    name = rng.choice(["Bone Chips", "Rusty Dagger", "Pelt", "Silk", "Ruby"]) + f" {rng.randrange(400)}"
+    return rng.choice([name, name.upper(), name.lower()])
+
+
+def assert_matches(table, model):
+    assert dict(table.items()) == model.as_dict()
+    assert len(table) == len(model.entries)
+    for key, (name, price) in model.entries.items():
+        assert table[key.upper()] == price
+        assert table.index[key] == name
+
+
+def test_compact_table_matches_dict():
+    rng = random.Random(1)
+    items = [(random_name(rng), rng.randrange(10000)) for _ in range(300)]
+    table = main.CompactPriceTable(items)
+    model = CaseInsensitiveModel(items)
+    assert_matches(table, model)
+
+    for step in range(3000):
+        name = random_name(rng)
+        if rng.random() < 0.3:
+            if name.casefold() in model.entries:
+                del table[name]
+                del model[name]
+            else:
+                with pytest.raises(KeyError):
+                    del table[name]
+        else:
+            price = rng.randrange(10000)
+            table[name] = price
+            model[name] = price
+        if step % 250 == 0:
+            assert_matches(table, model)
+    assert_matches(table, model)
+    assert "no such item" not in table
+    with pytest.raises(KeyError):
+        table["no such item"]
+
+
+def test_compact_table_merge_and_install():
+    rng = random.Random(2)
+    table = main.CompactPriceTable((random_name(rng), rng.randrange(100)) for _ in range(500))
+    model = CaseInsensitiveModel(table.items())
+    changes = {random_name(rng): rng.randrange(100) for _ in range(400)}
+
+    merged = main.merge_off_thread(table.copy(), changes)
+    main.apply_price_changes(table, changes, merged, table.version)
+    for name, price in changes.items():
+        model[name] = price
+    assert_matches(table, model)
+
+    # A table edited after the copy was taken applies the changes itself
+    version = table.version
+    merged = main.merge_off_thread(table.copy(), {"Fresh Item": 5})
+    table["Other Item"] = 6
+    main.apply_price_changes(table, {"Fresh Item": 5}, merged, version)
+    assert table["fresh item"] == 5 and table["other item"] == 6
+
+
+def test_compact_table_copy_is_independent():
+    table = main.CompactPriceTable({"Bone Chips": 5, "Pelt": 7})
+    copy = table.copy()
+    copy["Bone Chips"] = 9
+    copy["Silk"] = 1
+    del copy["Pelt"]
+    assert dict(table.items()) == {"Bone Chips": 5, "Pelt": 7}
+    assert dict(copy.items()) == {"Bone Chips": 9, "Silk": 1}
+
+
+def test_plain_prices_sorts_compact_tables_by_name():
+    table = main.CompactPriceTable({"ruby": 3, "Bone Chips": 1, "pelt": 2})
+    assert list(main.plain_prices(table)) == ["Bone Chips", "pelt", "ruby"]
+
+
+def test_snapshots_append_and_diff_across_connections(tmp_path):
+    path = str(tmp_path / "history.db")
+    gui, cli = main.SnapshotStore(path), main.SnapshotStore(path)
+    try:
+        first = gui.append("Bob", "vox", {"bone chips": ("Bone Chips", 10, 5), "pelt": ("Pelt", 2, 100)},
+                           taken_at=0.0)
+        # The second store only sees the first snapshot in the file, not in its own cache
+        second = cli.append("Bob", "vox", {"bone chips": ("Bone Chips", 4, 5), "pelt": ("Pelt", 2, 100),
+                                           "silk": ("Silk", 3, 20)}, taken_at=1800.0)
+        assert cli.append("Bob", "vox", {"bone chips": ("Bone Chips", 4, 5), "pelt": ("Pelt", 2, 100),
+                                         "silk": ("Silk", 3, 20)}) is None
+        # The first store's cached state is stale now and must be reloaded before appending
+        third = gui.append("Bob", "vox", {"pelt": ("Pelt", 2, 100), "silk": ("Silk", 5, 20)}, taken_at=3600.0)
+        assert first < second < third
+        assert gui.latest_id("Bob", "vox") == cli.latest_id("Bob", "vox") == third
+
+        diff = cli.diff("Bob", "vox", first)
+        assert diff['since_total'] == 250
+        assert diff['until_total'] == 300
+        assert diff['gained'] == [("Silk", 5)]
+        assert diff['lost'] == [("Bone Chips", 10)]
+        assert diff['value_change'] == 50
+        assert diff['per_hour'] == 50
+        assert gui.diff("Bob", "vox", second, third)['lost'] == [("Bone Chips", 4)]
+        assert [snapshot_id for snapshot_id, _, _ in gui.snapshots("Bob", "vox", since=1000.0)] == [second, third]
+        assert gui.snapshots("Alice", "vox") == []
+    finally:
+        gui.close()
+        cli.close()
+
+
+def test_price_file_recovers_from_corrupt_main_file(tmp_path):
+    price_file = main.PriceFile(str(tmp_path / "items.json"))
+    price_file.save({"Bone Chips": 5})
+    price_file.save({"Bone Chips": 6, "Pelt": 100})
+    with open(price_file.path, 'w', encoding='utf-8') as f:
+        f.write('{"Bone Chips": 6, "Pe')
+
+    assert price_file.load() == {"Bone Chips": 5}
+    # The main file is restored, so the next load doesn't need the backup
+    assert price_file.read_prices(price_file.path) == {"Bone Chips": 5}
+
+
+def test_price_file_keeps_corrupt_file_without_backup(tmp_path):
+    price_file = main.PriceFile(str(tmp_path / "items.json"))
+    price_file.save({"Bone Chips": 5})
+    with open(price_file.path, 'w', encoding='utf-8') as f:
+        f.write("not json")
+
+    assert price_file.load() is None
+    assert (tmp_path / "items.json.corrupt").read_text(encoding='utf-8') == "not json"
+
+
+def test_price_file_ignores_backup_not_in_manifest(tmp_path):
+    price_file = main.PriceFile(str(tmp_path / "items.json"))
+    price_file.save({"Bone Chips": 5})
+    price_file.save({"Bone Chips": 6})
+    with open(price_file.backup_path, 'w', encoding='utf-8') as f:
+        f.write('{"Bone Chips": 1}')
+    with open(price_file.path, 'w', encoding='utf-8') as f:
+        f.write("")
+
+    assert price_file.load() is None